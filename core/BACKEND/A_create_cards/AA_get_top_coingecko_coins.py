@@ -1,6 +1,11 @@
-import requests
+import os
+import sys
 import json
 
+# Adjust path to import core
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config
+
 # === CONFIGURATION SECTION ===
 API_URL = 'https://api.coingecko.com/api/v3/coins/markets'
 VS_CURRENCY = 'usd'  # currency to compare against
@@ -9,7 +14,6 @@ PER_PAGE = 250  # items per API page
 MAX_PAGES = 10  # max pages to fetch
 LIMIT = 20  # total number of coins to collect
 EXCLUDE_STABLECOINS = True  # exclude known stablecoins
-OUTPUT_FILENAME = 'core/data/coins_db.json'  # output file name
 
 # List of known stablecoins to exclude
 STABLECOINS = {
@@ -21,6 +25,9 @@ STABLECOINS = {
 
 def fetch_top_coins():
     """Fetch top coins from CoinGecko API, excluding stablecoins if configured"""
+    # requests is only needed for the fetch, not to import the stage
+    import requests
+
     params = {
         'vs_currency': VS_CURRENCY,
         'order': ORDER,
@@ -54,7 +61,8 @@ def fetch_top_coins():
 
 def save_to_json(data):
     """Save the data to a JSON file"""
-    with open(OUTPUT_FILENAME, 'w', encoding='utf-8') as f:
+    # Same file AE reads the coin symbols from
+    with open(config.COINS_DB_JSON, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
 
 def main():
@@ -1,29 +1,12 @@
 import os
-import csv
-from dotenv import load_dotenv
+import sys
 
 # --- Settings ---
-COLUMN_INDEX = 3  # Index of the column to update (changeable)
-ENV_FILE = '.env'  # Path to .env file
-CSV_ENV_KEY = 'SYSTEM_FULL_DB_CSV'  # Key in .env file for CSV file path
-COUNT_ENV_KEY = 'NUMBER_OF_CARDS'  # Key in .env file for number of rows
 WORD_TO_INSERT = 'SYSTEM'  # Word to insert
 
-# --- Load environment ---
-load_dotenv(ENV_FILE)
-csv_path = os.getenv(CSV_ENV_KEY)
-num_rows_str = os.getenv(COUNT_ENV_KEY)
-
-if not csv_path:
-    raise ValueError(f"Environment variable '{CSV_ENV_KEY}' not found in {ENV_FILE}")
-if not num_rows_str or not num_rows_str.isdigit():
-    raise ValueError(f"Environment variable '{COUNT_ENV_KEY}' not found or invalid in {ENV_FILE}")
-
-num_rows_to_add = int(num_rows_str)
-
-import sys
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config
 from core.database import query_db, update_card
 
 def update_user_type(count_needed):
@@ -43,11 +26,7 @@ def update_user_type(count_needed):
     print(f"Updated {count} cards with user_type.")
 
 def main():
-    if not num_rows_str or not num_rows_str.isdigit():
-        print(f"Invalid NUMBER_OF_CARDS: {num_rows_str}")
-        return
-
-    update_user_type(int(num_rows_str))
+    update_user_type(config.NUMBER_OF_CARDS)
 
 if __name__ == "__main__":
     main()
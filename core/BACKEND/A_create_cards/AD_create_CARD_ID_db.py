@@ -1,29 +1,18 @@
 #!/usr/bin/env python3
-import csv
-import random
 import os
-from dotenv import load_dotenv
-
-# ==== LOAD ENVIRONMENT VARIABLES ====
-load_dotenv()
-FILENAME = os.getenv('SYSTEM_FULL_DB_CSV')
-TARGET_COLUMN_INDEX = 0
-
-if not FILENAME:
-    print("ERROR: SYSTEM_FULL_DB_CSV is not set in the .env file.")
-    exit(1)
+import sys
+import random
 
 # ==== SETTINGS ====
-NUM_IDS_TO_ADD = int(os.getenv("NUMBER_OF_CARDS", 5))
 ID_PREFIX = 'Card_'
 ID_RANGE_START = 1
 ID_RANGE_END = 999999
 # ===================
 
-import sys
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
-from core.database import query_db, get_db
+from core.config import config
+from core.database import query_db, get_db, write_transaction
 
 def read_existing_ids():
     """Read existing IDs from the DB."""
@@ -35,11 +24,9 @@ def insert_ids(new_ids):
     if not new_ids:
         return
     
-    db = get_db()
-    for new_id in new_ids:
-        # We only insert the primary key, other fields are NULL/Default
-        db.execute("INSERT INTO cards (card_id) VALUES (?)", (new_id,))
-    db.commit()
+    # We only insert the primary key, other fields are NULL/Default
+    with write_transaction(get_db(), 'insert_card_ids') as db:
+        db.executemany("INSERT INTO cards (card_id) VALUES (?)", [(new_id,) for new_id in new_ids])
     print(f"Inserted {len(new_ids)} new cards.")
 
 def generate_unique_ids(prefix, existing, count, start, end):
@@ -53,7 +40,7 @@ def generate_unique_ids(prefix, existing, count, start, end):
 def main():
     existing = read_existing_ids()
     try:
-        new_ids = generate_unique_ids(ID_PREFIX, existing, NUM_IDS_TO_ADD, ID_RANGE_START, ID_RANGE_END)
+        new_ids = generate_unique_ids(ID_PREFIX, existing, config.NUMBER_OF_CARDS, ID_RANGE_START, ID_RANGE_END)
     except ValueError as e:
         print(f"ERROR: {e}")
         return
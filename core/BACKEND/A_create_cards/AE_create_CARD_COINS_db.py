@@ -6,31 +6,21 @@ Configuration section: adjust any setting here.
 """
 
 import os
+import sys
 import json
 import random
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# File paths (from .env or defaults)
-COINS_DB_JSON       = os.getenv("COINS_DB_JSON")
-SYSTEM_FULL_DB_CSV  = os.getenv("SYSTEM_FULL_DB_CSV")
 
 # Encoding for file I/O
 FILE_ENCODING       = "utf-8"
 
-# CSV processing settings
-CSV_SEPARATOR       = ","                 # Field separator in CSV
-TARGET_COLUMN_INDEX = 5                   # Index of the column to insert coins next to
-QUOTE_CHAR          = '"'                 # Quote character to wrap coin list
-
 # Randomization settings
 MIN_COINS_COUNT     = 2                   # Minimum number of coins to pick
 MAX_COINS_COUNT     = 7                   # Maximum number of coins to pick
 
-# Patching settings (loaded from .env)
-MAX_PATCHES         = int(os.getenv("NUMBER_OF_CARDS", "5"))  # Default to 5 if not set
+# Adjust path to import core
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config
+from core.database import query_db, update_card
 
 """
 Main script: reading data, patching CSV, writing result.
@@ -43,12 +33,6 @@ def load_coin_symbols(json_path):
     # Ensure symbols are uppercase strings
     return [item['symbol'].upper() for item in data]
 
-
-import sys
-# Adjust path to import core
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
-from core.database import query_db, update_card
-
 def update_coins(symbols, limit):
     """
     Find cards with description but empty coins, and insert random coins.
@@ -75,9 +59,8 @@ def update_coins(symbols, limit):
 
 def main():
     """Main entry point."""
-    symbols = load_coin_symbols(COINS_DB_JSON)
-    limit = MAX_PATCHES
-    update_coins(symbols, limit)
+    symbols = load_coin_symbols(config.COINS_DB_JSON)
+    update_coins(symbols, config.NUMBER_OF_CARDS)
 
 
 if __name__ == "__main__":
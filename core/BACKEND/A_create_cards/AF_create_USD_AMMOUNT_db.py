@@ -6,31 +6,18 @@ Configuration section: adjust any setting here.
 """
 
 import os
-import csv
+import sys
 import random
-from dotenv import load_dotenv
-
-# Load environment variables from .env file (optional)
-load_dotenv()
-
-# Path to the CSV file (set in .env as SYSTEM_FULL_DB_CSV or hardcode here)
-SYSTEM_FULL_DB_CSV = os.getenv("SYSTEM_FULL_DB_CSV")
-
-# File I/O settings
-FILE_ENCODING = "utf-8"
-
-# Column indexes (0-based)
-COIN_COLUMN_INDEX   = 6  # coins list is in the 4th column (index 3)
-TARGET_COLUMN_INDEX = 7  # insert generated values into the 5th column (index 4)
 
 # Randomization limits
 MIN_VALUE = 0.02   # minimum allowed for each generated value
 MAX_VALUE = 4.99   # maximum allowed for each generated value
 MAX_SUM   = 10.0   # total sum must be ≤ MAX_SUM
 
-# Processing limits (read from .env or adjust here)
-MAX_ROWS_TO_SERVE = int(os.getenv("NUMBER_OF_CARDS", "5"))
-SKIP_HEADER_ROWS  = int(os.getenv("SKIP_HEADER_ROWS", "1"))  # number of header rows to skip
+# Adjust path to import core
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config
+from core.database import query_db, update_card
 
 """
 Main script: reading data, patching CSV, writing result.
@@ -59,12 +46,6 @@ def generate_random_values(count,
         remaining -= val
     return values
 
-
-import sys
-# Adjust path to import core
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
-from core.database import query_db, update_card
-
 def update_usd_amounts(limit):
     """
     Find cards with coins but empty USD amount, and generate values.
@@ -96,8 +77,7 @@ def update_usd_amounts(limit):
 
 def main():
     """Main entry point."""
-    limit = MAX_ROWS_TO_SERVE
-    update_usd_amounts(limit)
+    update_usd_amounts(config.NUMBER_OF_CARDS)
 
 if __name__ == "__main__":
     main()
@@ -1,18 +1,10 @@
 import os
 import csv
 import random
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
 
 # Configuration: target column index (1-based)
 COLUMN_INDEX = 9  # e.g. 6 means the sixth column
 
-# Read number of cards to generate from environment variable
-# Default to 5 if not set or invalid
-NUMBER_OF_CARDS = int(os.getenv("NUMBER_OF_CARDS"))
-
 # Expanded list of crypto-themed epic adjectives
 ADJECTIVES = [
     "Genesis", "Quantum", "Decentralized", "Atomic", "Hyper",
@@ -75,6 +67,7 @@ def generate_legendary_names(count):
 import sys
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config
 from core.database import query_db, update_card
 
 def update_empty_cells(names):
@@ -99,12 +92,8 @@ def update_empty_cells(names):
     print(f"Updated {count} cards with new names.")
 
 def main():
-    # Generate legendary names based on env var
-    # Ensure env var is loaded? original script did load_dotenv
-    # But current_app might not be available if run standalone.
-    # We should keep load_dotenv if needed, but core.database handles DB path.
-    
-    legendary_names = generate_legendary_names(NUMBER_OF_CARDS)
+    # Generate legendary names, one per card of this run
+    legendary_names = generate_legendary_names(config.NUMBER_OF_CARDS)
     
     update_empty_cells(legendary_names)
 
@@ -1,41 +1,18 @@
 #!/usr/bin/env python3
-import csv
-import random
 import os
-from dotenv import load_dotenv
-
-# ==== LOAD ENVIRONMENT VARIABLES ====
-load_dotenv()
-FILENAME = os.getenv('SYSTEM_FULL_DB_CSV')
-NUM_CARDS_ENV = os.getenv('NUMBER_OF_CARDS')
+import sys
+import random
 
 # ==== SETTINGS ====
-TARGET_COLUMN_INDEX = 1    # Zero-based index for 'CARD_ID'
 TRIGGER_RUNS = 1           # Number of different IDs (batches) to generate in one run
 ID_PREFIX = 'Pack_'
 ID_RANGE_START = 1
 ID_RANGE_END = 999999
 # ===================
 
-# Validate required environment variables
-if not FILENAME:
-    print("ERROR: SYSTEM_FULL_DB_CSV is not set in the .env file.")
-    exit(1)
-
-if not NUM_CARDS_ENV:
-    print("ERROR: NUMBER_OF_CARDS is not set in the .env file.")
-    exit(1)
-
-try:
-    NUMBER_OF_CARDS = int(NUM_CARDS_ENV)  # Number of times to repeat each generated ID
-except ValueError:
-    print("ERROR: NUMBER_OF_CARDS must be an integer.")
-    exit(1)
-
-
-import sys
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config
 from core.database import query_db, update_card
 
 def read_existing_pack_ids():
@@ -92,7 +69,7 @@ def main():
         print(f"ERROR: {e}")
         return
 
-    update_pack_ids(unique_ids, NUMBER_OF_CARDS)
+    update_pack_ids(unique_ids, config.NUMBER_OF_CARDS)
 
 if __name__ == '__main__':
     main()
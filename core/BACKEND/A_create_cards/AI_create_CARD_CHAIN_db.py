@@ -1,23 +1,10 @@
 import os
 import csv
 import random
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
 
 # Configuration: target column index (1-based)
 COLUMN_INDEX = 10  # e.g. 6 means the sixth column
 
-# Read number of entries to pick strictly from environment variable
-# Raise error if missing or not an integer
-try:
-    NUMBER_OF_CARDS = int(os.environ["NUMBER_OF_CARDS"])
-except KeyError:
-    raise RuntimeError("Environment variable NUMBER_OF_CARDS is required")
-except ValueError:
-    raise RuntimeError("Environment variable NUMBER_OF_CARDS must be an integer")
-
 # Hardcoded list of 10 most popular blockchains
 BLOCKCHAINS = [
     "Ethereum",
@@ -40,6 +27,7 @@ def select_one_blockchain():
 import sys
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config
 from core.database import query_db, update_card
 
 def update_chain(chain_name, count_needed):
@@ -61,7 +49,7 @@ def update_chain(chain_name, count_needed):
 def main():
     # Select one random blockchain
     chosen = select_one_blockchain()
-    update_chain(chosen, NUMBER_OF_CARDS)
+    update_chain(chosen, config.NUMBER_OF_CARDS)
 
 if __name__ == "__main__":
     main()
@@ -1,23 +1,10 @@
 import os
 import csv
 import random
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
 
 # Configuration: target column index (1-based)
 COLUMN_INDEX = 12
 
-# Read number of entries to pick strictly from environment variable
-# Raise error if missing or not an integer
-try:
-    NUMBER_OF_CARDS = int(os.environ["NUMBER_OF_CARDS"])
-except KeyError:
-    raise RuntimeError("Environment variable NUMBER_OF_CARDS is required")
-except ValueError:
-    raise RuntimeError("Environment variable NUMBER_OF_CARDS must be an integer")
-
 # List of all possible card rarity types
 CARD_TYPE = [
     "Legendary",              # classic high-value tier
@@ -61,6 +48,7 @@ def select_one_blockchain():
 import sys
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config
 from core.database import query_db, update_card
 
 def update_empty_cells(names):
@@ -81,7 +69,7 @@ def update_empty_cells(names):
 
 def main():
     # Prepare list with a random blockchain type for each card
-    card_list = [select_one_blockchain() for _ in range(NUMBER_OF_CARDS)]
+    card_list = [select_one_blockchain() for _ in range(config.NUMBER_OF_CARDS)]
     
     update_empty_cells(card_list)
 
@@ -1,29 +1,10 @@
 import os
 import csv
 from datetime import date
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
 
 # Configuration: target column index (1-based)
 COLUMN_INDEX = 3
 
-# Read number of entries to pick strictly from environment variable
-# Raise error if missing or not an integer
-try:
-    NUMBER_OF_CARDS = int(os.environ["NUMBER_OF_CARDS"])
-except KeyError:
-    raise RuntimeError("Environment variable NUMBER_OF_CARDS is required")
-except ValueError:
-    raise RuntimeError("Environment variable NUMBER_OF_CARDS must be an integer")
-
-# Read CSV path from environment variable
-try:
-    FILE_PATH = os.environ["SYSTEM_FULL_DB_CSV"]
-except KeyError:
-    raise RuntimeError("Environment variable SYSTEM_FULL_DB_CSV is required")
-
 def select_today_date():
     """
     Return today's date in YYYY-MM-DD format.
@@ -33,6 +14,7 @@ def select_today_date():
 import sys
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config
 from core.database import query_db, update_card
 
 def update_dates(today, count_needed):
@@ -50,7 +32,7 @@ def update_dates(today, count_needed):
 
 def main():
     today = select_today_date()
-    update_dates(today, NUMBER_OF_CARDS)
+    update_dates(today, config.NUMBER_OF_CARDS)
 
 if __name__ == "__main__":
     main()
@@ -2,18 +2,9 @@
 # -*- coding: utf-8 -*-
 
 import os
-import base64
-import csv
-from dotenv import load_dotenv, find_dotenv
-
-# Load .env file
-dotenv_path = find_dotenv()
-if not dotenv_path:
-    raise FileNotFoundError(".env file not found")
-load_dotenv(dotenv_path)
-
 import sys
 import base64
+
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
 from core.database import query_db, update_card
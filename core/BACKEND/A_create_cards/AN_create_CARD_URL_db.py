@@ -2,30 +2,16 @@
 # -*- coding: utf-8 -*-
 
 import os
-import csv
-from urllib.parse import urlparse
-from dotenv import load_dotenv
-
-# === SETTINGS ===
-ENV_FILE = '.env'
-ENV_GOOGLE_CALLBACK_URL = 'GOOGLE_CALLBACK_URL'
-ENV_SYSTEM_CARD_CSV = 'SYSTEM_FULL_DB_CSV'
-URL_COLUMN_INDEX = 12          # index of the column containing the URLs (0-based)
-PREFIX_SEGMENT = 'card'       # the path segment to enforce in the URL prefix
-
-# === LOAD ENVIRONMENT VARIABLES ===
-load_dotenv(ENV_FILE)
-
-# === RETRIEVE SETTINGS ===
 import sys
 from urllib.parse import urlparse
+
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config
 from core.database import query_db, update_card
 
 # === SETTINGS ===
-ENV_GOOGLE_CALLBACK_URL = 'GOOGLE_CALLBACK_URL'
-PREFIX_SEGMENT = 'card'
+PREFIX_SEGMENT = 'card'       # the path segment to enforce in the URL prefix
 
 def update_urls(new_prefix):
     rows = query_db("SELECT card_id, card_url FROM cards")
@@ -74,11 +60,7 @@ def update_urls(new_prefix):
     print(f"Updated {count} card URLs.")
 
 def main():
-    callback_url = os.getenv(ENV_GOOGLE_CALLBACK_URL)
-    if not callback_url:
-        callback_url = "https://nakama.weforks.org"
-        print(f"WARNING: using default: {callback_url}")
-        
+    callback_url = config.GOOGLE_CALLBACK_URL
     parsed_callback = urlparse(callback_url)
     new_prefix = f"{parsed_callback.scheme}://{parsed_callback.netloc}/{PREFIX_SEGMENT}/"
     
@@ -1,26 +1,14 @@
 import os
 import re
-import csv
 import sys
-import qrcode
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
-
-import sys
-import qrcode
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config
 from core.database import query_db
 
-# Configurable parameters from environment
-OUTPUT_DIR = os.getenv('QR_CODES_FOLDER')
-ENCODING = 'utf-8'
-
-# QR code settings
+# QR code settings (error correction: qrcode's ERROR_CORRECT_L)
 QR_VERSION = 1
-ERROR_CORRECTION = qrcode.constants.ERROR_CORRECT_L
 BOX_SIZE = 10
 BORDER = 4
 FILL_COLOR = "black"
@@ -38,13 +26,12 @@ def sanitize_filename(name):
     return sanitized.strip()
 
 def generate_qr_codes():
-    if not OUTPUT_DIR:
-        print("QR_CODES_FOLDER env var not set.")
-        return
+    import qrcode  # only this stage needs it
+    output_dir = config.QR_CODES_FOLDER
 
     # Ensure output directory exists
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
 
     rows = query_db("SELECT card_id, card_url FROM cards")
     
@@ -60,7 +47,7 @@ def generate_qr_codes():
             
         safe_name = sanitize_filename(cid)
         output_filename = FILE_NAME_TEMPLATE.format(filename=safe_name)
-        output_path = os.path.join(OUTPUT_DIR, output_filename)
+        output_path = os.path.join(output_dir, output_filename)
         
         if os.path.exists(output_path):
             skipped += 1
@@ -69,7 +56,7 @@ def generate_qr_codes():
         # Create QR code object
         qr = qrcode.QRCode(
             version=QR_VERSION,
-            error_correction=ERROR_CORRECTION,
+            error_correction=qrcode.constants.ERROR_CORRECT_L,
             box_size=BOX_SIZE,
             border=BORDER,
         )
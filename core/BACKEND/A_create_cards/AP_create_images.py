@@ -1,12 +1,11 @@
-from PIL import Image, ImageDraw
 import random
 import os
 import re
-from dotenv import load_dotenv
+import sys
 
-# === LOAD ENVIRONMENT VARIABLES ===
-load_dotenv()
-OUTPUT_DIR = os.getenv('CARDS_BANK_FOLDER') 
+# Adjust path to import core
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config
 
 # === SETTINGS ===
 IMAGE_WIDTH = 768                      # Width of the generated image
@@ -17,6 +16,9 @@ FILE_EXTENSION = '.png'                # File extension (including dot)
 
 # Universal image generation function
 def generate_image(width, height, background_color, draw_function, filename):
+    # Pillow is only needed here, not to import the stage
+    from PIL import Image, ImageDraw
+
     # Create a blank image
     image = Image.new('RGB', (width, height), background_color)
     draw = ImageDraw.Draw(image)
@@ -67,17 +69,19 @@ def get_next_start_index(directory, extension):
         return 1
 
 def main():
+    output_dir = config.CARDS_BANK_FOLDER
+
     # Ensure output directory exists
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
 
     # Find the starting index
-    start_index = get_next_start_index(OUTPUT_DIR, FILE_EXTENSION)
+    start_index = get_next_start_index(output_dir, FILE_EXTENSION)
 
     # Generate images based on NUM_IMAGES setting
     for idx in range(start_index, start_index + NUM_IMAGES):
         # Cycle through available draw functions
         draw_func = DRAW_FUNCTIONS[(idx - 1) % len(DRAW_FUNCTIONS)]
-        filename = os.path.join(OUTPUT_DIR, f"{idx:03}{FILE_EXTENSION}")
+        filename = os.path.join(output_dir, f"{idx:03}{FILE_EXTENSION}")
         generate_image(
             width=IMAGE_WIDTH,
             height=IMAGE_HEIGHT,
@@ -1,87 +1,106 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-
+"""
+Bind new card images to cards that have none yet.
+
+Unbound cards are the ones with no image_filename in the DB; unbound files are
+the images in CARDS_BANK_FOLDER not yet named after a card. Both sides are
+sorted and paired in order, every file is renamed to <card_id><ext>, and all
+image_filename values are written in one transaction. AV_create_thumbnails then
+hashes the new images and makes their thumbnails.
+
+Files are renamed before the DB write: if a run stops in between, the next run
+finds <card_id><ext> already on disk for the unbound card and just records it.
+"""
 import os
 import sys
-import pandas as pd
-from dotenv import load_dotenv
+import time
 
-# === LOAD ENVIRONMENT VARIABLES ===
-ENV_FILE = '.env'
-load_dotenv(ENV_FILE)  # Load variables from .env before calling getenv
+# Adjust path to import core
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config, ConfigError
+from core.database import get_db, init_db, query_db, write_transaction
 
 # === SETTINGS ===
-CARDS_BANK_FOLDER = os.getenv('CARDS_BANK_FOLDER')            # Folder with card files
-SYSTEM_FULL_DB_CSV = os.getenv('SYSTEM_FULL_DB_CSV')      # Path to auth CSV
-CARD_ID_COL_INDEX = 0                                         # Index of CARD_ID column (0-based)
-PREFIX = 'Card_'                                              # Files with this prefix are skipped
-
-# === VALIDATE CONFIGURATION ===
-if not CARDS_BANK_FOLDER:
-    print('Error: CARDS_BANK_FOLDER not set in environment variables.', file=sys.stderr)
-    sys.exit(1)
-if not SYSTEM_FULL_DB_CSV:
-    print('Error: SYSTEM_FULL_DB_CSV not set in environment variables.', file=sys.stderr)
-    sys.exit(1)
-
-def main():
-    """Rename all non-prefixed files to next available CARD_IDs based on column index."""
-    # Read CSV into DataFrame
+PREFIX = 'Card_'                                    # Files with this prefix are already named after a card
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}        # Same sources AV_create_thumbnails looks for
+# ===================
+
+def scan_images(folder):
+    """One pass over the folder: ({card_id: filename} already named, sorted unbound filenames)."""
+    named, unbound = {}, []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            base, ext = os.path.splitext(entry.name)
+            if ext.lower() not in IMAGE_EXTENSIONS or entry.name.startswith('.') or not entry.is_file():
+                continue
+            if entry.name.startswith(PREFIX):
+                named.setdefault(base, entry.name)
+            else:
+                unbound.append(entry.name)
+    unbound.sort()
+    return named, unbound
+
+def unbound_cards():
+    """card_ids with no image recorded, in card_id order."""
+    return [row['card_id'] for row in query_db(
+        "SELECT card_id FROM cards WHERE image_filename IS NULL OR image_filename = '' ORDER BY card_id"
+    )]
+
+def plan_bindings(cards, named, unbound):
+    """
+    (existing, renames): cards whose <card_id><ext> file is already there, and
+    (card_id, old_name, new_name) for new files paired with the remaining cards.
+    """
+    existing = [(cid, named[cid]) for cid in cards if cid in named]
+    taken = named.keys()
+    free_cards = [cid for cid in cards if cid not in taken]
+    renames = [
+        (cid, filename, cid + os.path.splitext(filename)[1].lower())
+        for cid, filename in zip(free_cards, unbound)
+    ]
+    return existing, renames
+
+def bind_images():
     try:
-        df = pd.read_csv(SYSTEM_FULL_DB_CSV, dtype=str)
-    except Exception as e:
-        print(f"Error reading CSV at '{SYSTEM_FULL_DB_CSV}': {e}", file=sys.stderr)
+        folder = config.CARDS_BANK_FOLDER
+    except ConfigError as e:
+        print(f'Error: {e}', file=sys.stderr)
         sys.exit(1)
 
-    # Validate index
-    cols = list(df.columns)
-    if CARD_ID_COL_INDEX < 0 or CARD_ID_COL_INDEX >= len(cols):
-        print(f"Error: CARD_ID_COL_INDEX {CARD_ID_COL_INDEX} is out of range (0–{len(cols)-1}).", file=sys.stderr)
-        sys.exit(1)
-
-    # Determine column name for CARD_ID
-    card_id_col = cols[CARD_ID_COL_INDEX]
-
-    # Extract existing CARD_IDs (non-null, non-empty)
-    card_ids = df[card_id_col].dropna().astype(str).str.strip().tolist()
-
-    # List files in cards directory
+    start = time.perf_counter()
     try:
-        files = [f for f in os.listdir(CARDS_BANK_FOLDER)
-                 if os.path.isfile(os.path.join(CARDS_BANK_FOLDER, f))]
-    except Exception as e:
-        print(f"Error listing directory '{CARDS_BANK_FOLDER}': {e}", file=sys.stderr)
+        named, unbound = scan_images(folder)
+    except OSError as e:
+        print(f"Error listing directory '{folder}': {e}", file=sys.stderr)
         sys.exit(1)
+    cards = unbound_cards()
+    existing, renames = plan_bindings(cards, named, unbound)
 
-    # Track base names already in use to avoid collisions
-    existing_bases = {os.path.splitext(f)[0] for f in files}
-
-    # Iterate through all files without the prefix
-    for filename in sorted(files):
-        if filename.startswith(PREFIX):
+    bound = list(existing)
+    for cid, old_name, new_name in renames:
+        try:
+            os.rename(os.path.join(folder, old_name), os.path.join(folder, new_name))
+        except OSError as e:
+            print(f"Error renaming '{old_name}' to '{new_name}': {e}", file=sys.stderr)
             continue
+        bound.append((cid, new_name))
 
-        # Determine next available CARD_ID not already used
-        new_id = next((cid for cid in card_ids if cid and cid not in existing_bases), None)
-        if not new_id:
-            break  # Or continue to try other files? here we stop since no IDs remain
+    if bound:
+        # Only fill cards that are still unbound: never overwrite an image bound meanwhile
+        with write_transaction(get_db(), 'bind_card_images') as db:
+            db.executemany(
+                "UPDATE cards SET image_filename = ? WHERE card_id = ? AND (image_filename IS NULL OR image_filename = '')",
+                [(filename, cid) for cid, filename in bound]
+            )
 
-        # Prepare new file name
-        old_path = os.path.join(CARDS_BANK_FOLDER, filename)
-        ext = os.path.splitext(filename)[1]
-        new_name = new_id + ext
-        new_path = os.path.join(CARDS_BANK_FOLDER, new_name)
+    print(f"Bound {len(bound)} images to cards ({len(renames)} renamed, {len(existing)} already named) "
+          f"in {time.perf_counter() - start:.2f}s; "
+          f"{max(0, len(unbound) - len(renames))} images and {len(cards) - len(bound)} cards left unbound.")
 
-        # Perform rename
-        try:
-            os.rename(old_path, new_path)
-            # Mark this ID/base as used
-            existing_bases.add(new_id)
-        except Exception as e:
-            print(f"Error renaming '{filename}' to '{new_name}': {e}", file=sys.stderr)
+def main():
+    init_db()
+    bind_images()
 
 if __name__ == '__main__':
     main()
-
-
-
@@ -1,10 +1,5 @@
 import os
 import csv
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
 import sys
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
@@ -1,10 +1,5 @@
 import os
 import csv
-from dotenv import load_dotenv
-
-load_dotenv()
-
-SOURCE_FILE = os.path.join("core", "data", "not_used", "GAME_STATS.csv")
 import sys
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
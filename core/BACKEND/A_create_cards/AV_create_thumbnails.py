@@ -0,0 +1,115 @@
+import os
+import sys
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+# === SETTINGS ===
+THUMB_WIDTHS = [140, 280, 560]          # Card is displayed 280px wide; covers 0.5x-2x
+SOURCE_EXTENSIONS = ['.png', '.jpg', '.jpeg']
+WEBP_QUALITY = 80
+MAX_WORKERS = os.cpu_count() or 1       # Pillow releases the GIL while resizing/encoding
+HASH_LENGTH = 16                        # hex chars of sha256 used in immutable image URLs
+# ===================
+
+# Adjust path to import core
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.config import config, ConfigError
+from core.database import get_db, init_db, query_db, write_transaction
+
+def find_source_image(card_id):
+    """Return the path of the card's full-size image, or None."""
+    for ext in SOURCE_EXTENSIONS:
+        path = os.path.join(config.CARDS_BANK_FOLDER, f"{card_id}{ext}")
+        if os.path.exists(path):
+            return path
+    return None
+
+def hash_file(path):
+    """Return the truncated sha256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+def create_variants(card_id, source_path):
+    """Hash the source and write a WebP and a PNG thumbnail for every width. Runs in a worker thread."""
+    # Pillow is only needed here, not to import the stage
+    from PIL import Image
+
+    image_hash = hash_file(source_path)
+    variants = []
+    with Image.open(source_path) as img:
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA')
+        # Never upscale; small sources get a single variant at their own width
+        for width in sorted({min(w, img.width) for w in THUMB_WIDTHS}):
+            height = round(img.height * width / img.width)
+            thumb = img.resize((width, height), Image.LANCZOS)
+            for fmt, ext, options in (
+                ('webp', '.webp', {'quality': WEBP_QUALITY, 'method': 4}),
+                ('png', '.png', {'optimize': True}),
+            ):
+                filename = f"{card_id}_{width}w{ext}"
+                thumb.save(os.path.join(config.thumbs_folder, filename), **options)
+                variants.append((width, fmt, filename))
+    return image_hash, variants
+
+def select_stale_cards():
+    """Return (card_id, source_path, mtime) for cards whose hash or thumbnails are missing or older than the source."""
+    recorded = {}
+    for row in query_db("SELECT card_id, MIN(source_mtime) AS mtime, COUNT(*) AS n FROM card_thumbnails GROUP BY card_id"):
+        recorded[row['card_id']] = (row['mtime'], row['n'])
+
+    stale = []
+    for row in query_db("SELECT card_id, image_hash FROM cards"):
+        cid = row['card_id']
+        source = find_source_image(cid)
+        if not source:
+            continue
+        mtime = os.path.getmtime(source)
+        if not row['image_hash'] or recorded.get(cid, (None, 0))[0] != mtime:
+            stale.append((cid, source, mtime))
+    return stale
+
+def generate_thumbnails():
+    try:
+        os.makedirs(config.thumbs_folder, exist_ok=True)
+    except ConfigError as e:
+        print(e)
+        return
+
+    stale = select_stale_cards()
+    if not stale:
+        print("Thumbnails are up to date.")
+        return
+
+    done = []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {pool.submit(create_variants, cid, src): (cid, src, mtime) for cid, src, mtime in stale}
+        for future, (cid, src, mtime) in futures.items():
+            try:
+                done.append((cid, src, mtime) + future.result())
+            except Exception as e:
+                print(f"Error creating thumbnails for {cid}: {e}")
+
+    # Write everything in one short transaction, after the image work is finished
+    with write_transaction(get_db(), 'create_thumbnails') as db:
+        for cid, src, mtime, image_hash, variants in done:
+            db.execute(
+                "UPDATE cards SET image_filename = ?, image_hash = ? WHERE card_id = ?",
+                (os.path.basename(src), image_hash, cid)
+            )
+            db.execute("DELETE FROM card_thumbnails WHERE card_id = ?", (cid,))
+            db.executemany(
+                "INSERT INTO card_thumbnails (card_id, width, format, filename, source_mtime) VALUES (?, ?, ?, ?, ?)",
+                [(cid, width, fmt, filename, mtime) for width, fmt, filename in variants]
+            )
+    print(f"Hashed and created thumbnails for {len(done)} cards.")
+
+def main():
+    init_db()
+    generate_thumbnails()
+
+if __name__ == "__main__":
+    main()
@@ -13,7 +13,7 @@ scripts = [
     "AF_create_USD_AMMOUNT_db.py",      # fill usd (needs coins)
     "AH_create_PACK_ID_db.py",
     "AL_create_CARD_DATE_db.py",
-    "AB_create_USER_TYPE_db.py",
+    # "AB_create_USER_TYPE_db.py",      # user_type set by the cards insert/owner triggers
     "AC_create_CARD_OWNER_db.py",
     "AG_create_CARD_NAME_db.py",
     "AI_create_CARD_CHAIN_db.py",
@@ -26,7 +26,8 @@ scripts = [
     "AN_create_CARD_URL_db.py",         # finalize URLs
     "AO_create_qr_files.py",            # generate QRs
     # "AP_create_images.py",            # skipped
-    # "AQ_create_images_names.py",      # skipped
+    "AQ_create_images_names.py",        # bind new images in CARDS_BANK_FOLDER to cards without one
+    "AV_create_thumbnails.py",          # resize card images (incremental)
 ]
 
 for script_path in scripts:
@@ -0,0 +1,37 @@
+import os
+import sys
+# Adjust path to import core
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.database import get_db, init_db, write_transaction
+
+def refresh_store_catalog():
+    """
+    Rebuild the store listing from cards.
+    A pack is for sale only while every card in it is SYSTEM-owned and unclaimed (STATUS_1).
+    """
+    db = get_db()
+    with write_transaction(db, 'refresh_store_catalog'):
+        db.execute("DELETE FROM store_packs")
+        db.execute("""
+            INSERT INTO store_packs (pack_id, chain, theme, card_types, card_count, card_date)
+            SELECT pack_id, MIN(chain), MIN(theme), GROUP_CONCAT(DISTINCT card_type), COUNT(*), MIN(card_date)
+            FROM cards
+            WHERE pack_id IS NOT NULL AND pack_id != ''
+            GROUP BY pack_id
+            HAVING SUM(owner = 'SYSTEM' AND COALESCE(status, '') IN ('', 'STATUS_1')) = COUNT(*)
+        """)
+        db.execute("""
+            INSERT OR IGNORE INTO store_pack_types (card_type, pack_id)
+            SELECT c.card_type, c.pack_id
+            FROM cards c JOIN store_packs p ON p.pack_id = c.pack_id
+            WHERE c.card_type IS NOT NULL AND c.card_type != ''
+        """)
+    count = db.execute("SELECT COUNT(*) FROM store_packs").fetchone()[0]
+    print(f"Store catalog lists {count} packs.")
+
+def main():
+    init_db()
+    refresh_store_catalog()
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,7 @@ import importlib
 
 # List of script paths (relative or absolute)
 scripts = [
-    
+    "CA_refresh_store_catalog.py",      # rebuild SYSTEM-owned pack listing
     # -----------------------
 
 ]
@@ -1,113 +1,126 @@
 import os
 import csv
 import sys
-from dotenv import load_dotenv
+import time
+import sqlite3
+import argparse
 
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
-from core.database import query_db, update_card, get_db
+from core.config import config
+from core.database import CARD_URL_KEY, card_url_key, get_db, init_db, write_transaction
 
-def main():
-    load_dotenv()
-    AUTH_CSV = os.getenv('AUTH_USERS_CSV') or os.getenv('AUTH_USERS')
-    # fallback if env var name varies
-    if not AUTH_CSV:
-         # Try default path based on observed file context
-         default_path = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'users_auth.csv')
-         if os.path.exists(default_path):
-             AUTH_CSV = default_path
-         else:
-             print("ERROR: AUTH_USERS_CSV not set and default not found.")
-             return
-
-    if not os.path.exists(AUTH_CSV):
-        print("No auth users file found.")
-        return
-
-    # Read pending changes
-    with open(AUTH_CSV, newline='', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        # Check if header exists? routes.py writes [username, ref_url]. 
-        # If file started empty, it has no header.
-        # If it has header, DictReader is better.
-        # Let's peek.
-        f.seek(0)
+def read_auth_csv(path):
+    """Parse the legacy users_auth.csv (with or without a header) into (username, url) pairs."""
+    with open(path, newline='', encoding='utf-8') as f:
         first_line = f.readline()
         f.seek(0)
-        
         has_header = "AUTH_MAILS" in first_line or "username" in first_line.lower()
-        
+
         rows = []
         if has_header:
-            dict_reader = csv.DictReader(f)
-            # Map known headers to standard keys
-            for r in dict_reader:
-                # Support multiple possible header names
+            # Support multiple possible header names
+            for r in csv.DictReader(f):
                 u = r.get('AUTH_MAILS') or r.get('username') or r.get('USERNAME')
                 l = r.get('AUTH_URLS') or r.get('ref_url') or r.get('REF_URL')
                 if u and l:
-                    rows.append({'username': u, 'url': l})
+                    rows.append((u, l))
         else:
-            # Assume no header: col 0 = username, col 1 = url
-            csv_reader = csv.reader(f)
-            for r in csv_reader:
+            # No header: col 0 = username, col 1 = url
+            for r in csv.reader(f):
                 if len(r) >= 2:
-                    rows.append({'username': r[0], 'url': r[1]})
+                    rows.append((r[0], r[1]))
+    return rows
 
-    if not rows:
+def migrate_csv_backlog(db, path):
+    """Move claims still pending in the legacy CSV into pending_claims (once; the file is renamed)."""
+    if not path or not os.path.exists(path):
+        return
+    # Rename first so a concurrent run can't import the same rows twice
+    migrated = f"{path}.migrated"
+    try:
+        os.replace(path, migrated)
+    except OSError:
         return
+    rows = read_auth_csv(migrated)
+    with write_transaction(db, 'migrate_claims'):
+        db.executemany('INSERT INTO pending_claims (username, ref_url) VALUES (?, ?)',
+                       [(username, card_url_key(url)) for username, url in rows])
+    print(f"Migrated {len(rows)} pending claims from {path} to pending_claims.")
 
-    processed_indices = set()
-    db = get_db()
-    
-    count = 0
-    for i, row in enumerate(rows):
-        username = row['username']
-        ref_url = row['url']
-        
-        # We need to find the card. 
-        # ref_url might be full url "http.../card/key" or just key?
-        # In routes.py: `session.pop('ref_url', '')`
-        # In `serve_card_page(key)` it seems `request.url` or similar is stored?
-        # Let's assume ref_url MATCHES card_url in DB or suffix.
-        # Try exact match first, then suffix match.
-        
-        sql = "SELECT card_id FROM cards WHERE card_url = ? OR card_url LIKE ?"
-        # Try both exact and suffix (note: suffix needs %)
-        # But SQLite LIKE is case insensitive usually.
-        
-        # If ref_url is just the key, we search for `.../card/<key>`
-        # If ref_url is full url, we search exact.
-        
-        match = query_db(sql, (ref_url, f'%{ref_url}'), one=True)
-        
-        if match:
-            cid = match['card_id']
-            # Update Owner and Status
-            # Use direct execute for atomicity if possible, or helper
-            db.execute("UPDATE cards SET owner = ?, status = 'STATUS_2' WHERE card_id = ?", (username, cid))
-            processed_indices.add(i)
-            count += 1
-        else:
-            print(f"Card not found for URL: {ref_url}")
+def process_claims_batch(db, limit=None):
+    """
+    Apply up to `limit` (default CLAIM_BATCH_SIZE) queued claims in one write transaction. Taking the batch
+    and changing the cards happen under the same lock, so concurrent runs never
+    process a claim twice. Returns the number of claims handled.
+    """
+    limit = limit or config.CLAIM_BATCH_SIZE
+    with write_transaction(db, 'process_claims'):
+        claims = db.execute('''
+            SELECT id, username, ref_url FROM pending_claims
+            WHERE processed_at IS NULL ORDER BY id LIMIT ?
+        ''', (limit,)).fetchall()
+        for claim in claims:
+            # ref_url is queued as the card key; rows queued before that may still be a URL
+            key = card_url_key(claim['ref_url'])
+            # Exact match on idx_cards_url_key: one index probe per claim while holding the write lock
+            match = db.execute(
+                f"SELECT card_id FROM cards WHERE {CARD_URL_KEY} = ? LIMIT 1", (key,)
+            ).fetchone() if key else None
+            if match is None:
+                result = 'not_found'
+                print(f"Card not found for URL: {claim['ref_url']}")
+            else:
+                # Only cards still held by SYSTEM can be claimed; first claim wins
+                changed = db.execute(
+                    "UPDATE cards SET owner = ?, status = 'STATUS_2' WHERE card_id = ? AND owner = 'SYSTEM'",
+                    (claim['username'], match['card_id'])
+                ).rowcount
+                result = 'claimed' if changed else 'already_owned'
+            db.execute(
+                "UPDATE pending_claims SET processed_at = datetime('now'), result = ? WHERE id = ?",
+                (result, claim['id'])
+            )
+    return len(claims)
+
+def process_pending_claims(db):
+    """Apply queued claims batch by batch until the queue is empty; returns how many were handled."""
+    total, batch_size = 0, config.CLAIM_BATCH_SIZE
+    while True:
+        handled = process_claims_batch(db, batch_size)
+        total += handled
+        if handled < batch_size:
+            return total
+
+def has_pending_claims(db):
+    """Cheap read on the partial index, so an idle worker never takes the write lock."""
+    return db.execute('SELECT 1 FROM pending_claims WHERE processed_at IS NULL LIMIT 1').fetchone() is not None
 
-    db.commit()
-    print(f"Updated {count} cards to STATUS_2 (Owned by {username}).")
+def run_forever(db, poll_seconds=None):
+    """The claims_worker service: drain pending_claims whenever /login has queued some."""
+    poll_seconds = poll_seconds or config.CLAIM_POLL_SECONDS
+    while True:
+        try:
+            if has_pending_claims(db):
+                print(f"Processed {process_pending_claims(db)} pending claims.", flush=True)
+        except sqlite3.Error as e:
+            print(f"Processing claims failed: {e}", file=sys.stderr, flush=True)
+        time.sleep(poll_seconds)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply the card claims queued in pending_claims')
+    parser.add_argument('--loop', action='store_true', help='keep draining the queue every CLAIM_POLL_SECONDS')
+    args = parser.parse_args(argv)
+
+    init_db()
+    db = get_db()
+    legacy_csv = (config.raw('AUTH_USERS_CSV') or config.raw('AUTH_USERS')
+                  or os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'users_auth.csv'))
+    migrate_csv_backlog(db, legacy_csv)
 
-    # Rewriting CSV (removing processed)
-    # We should preserve header if it existed.
-    if processed_indices:
-        remaining_rows = [row for i, row in enumerate(rows) if i not in processed_indices]
-        
-        with open(AUTH_CSV, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            # If we want to keep a header? logic becomes complex if we guessed.
-            # Easiest: If we detected header, write it back? 
-            # Or just write rows. `routes.py` appends without header checks.
-            # If we switch to always no header (or consistent header), it's better.
-            # For now, just write what remains.
-            for r in remaining_rows:
-                writer.writerow([r['username'], r['url']])
+    if args.loop:
+        run_forever(db)
+    print(f"Processed {process_pending_claims(db)} pending claims.")
 
 if __name__ == '__main__':
     main()
@@ -3,32 +3,17 @@ import sys
 
 # Adjust path to import core
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
-from core.database import get_db
+from core.database import get_db, init_db, sync_user_types, write_transaction
 
 def main():
-    db = get_db()
-    
-    # 1. Default all to SYSTEM if owner is missing
-    db.execute("UPDATE cards SET user_type = 'SYSTEM' WHERE owner IS NULL OR owner = ''")
-    
-    # 2. Update based on known users (ADMIN or USER)
-    # SQLite supports correlated subquery updates
-    db.execute("""
-        UPDATE cards 
-        SET user_type = (SELECT role FROM users WHERE users.username = cards.owner)
-        WHERE owner IN (SELECT username FROM users)
-    """)
-    
-    # 3. Any remaining non-system that didn't match a user?
-    # Original logic: "All other cases default to SYSTEM".
-    # So if owner is set but NOT in users table, it becomes SYSTEM.
-    db.execute("""
-        UPDATE cards 
-        SET user_type = 'SYSTEM'
-        WHERE owner IS NOT NULL AND owner != '' AND owner NOT IN (SELECT username FROM users)
-    """)
-    
-    db.commit()
+    """
+    Manual repair: recompute user_type for every card.
+    Not part of D_run_change_card_owner any more; the cards/users triggers
+    created by init_db() keep user_type current on every owner or role change.
+    """
+    init_db()
+    with write_transaction(get_db(), 'sync_user_types') as db:
+        sync_user_types(db)
     print("Updated user_type for all cards.")
 
 if __name__ == '__main__':
@@ -0,0 +1,45 @@
+import os
+import sys
+import argparse
+
+# Adjust path to import core
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from core.database import init_db
+from core.transfers import TransferError, transfer_cards
+
+def read_ids(path):
+    """One id per line; blank lines and # comments are skipped."""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+def main(argv=None):
+    """
+    Bulk ownership transfer for giveaways and tournament payouts, e.g.
+        python DC_transfer_cards.py --to user1 --packs Pack_078970 Pack_162306
+        python DC_transfer_cards.py --to user1 --cards-file payout.txt
+    """
+    parser = argparse.ArgumentParser(description='Transfer whole packs and/or cards to a user in one transaction.')
+    parser.add_argument('--to', required=True, help='username receiving the cards')
+    parser.add_argument('--cards', nargs='*', default=[], help='card_ids')
+    parser.add_argument('--packs', nargs='*', default=[], help='pack_ids')
+    parser.add_argument('--cards-file', help='file with one card_id per line')
+    parser.add_argument('--packs-file', help='file with one pack_id per line')
+    args = parser.parse_args(argv)
+    init_db()  # nakama.db from core.config (NAKAMA_DB_PATH), with the schema the transfer relies on
+
+    card_ids = args.cards + (read_ids(args.cards_file) if args.cards_file else [])
+    pack_ids = args.packs + (read_ids(args.packs_file) if args.packs_file else [])
+    try:
+        result = transfer_cards(args.to, card_ids=card_ids, pack_ids=pack_ids)
+    except TransferError as e:
+        print(f"ERROR: {e}")
+        sys.exit(1)
+
+    print(f"Transferred {result['transferred']} cards to {args.to} ({len(pack_ids)} packs, {len(card_ids)} card ids).")
+    if result['missing_packs']:
+        print(f"Packs not found: {', '.join(result['missing_packs'])}")
+    if result['missing_cards']:
+        print(f"Cards not found: {', '.join(result['missing_cards'])}")
+
+if __name__ == '__main__':
+    main()
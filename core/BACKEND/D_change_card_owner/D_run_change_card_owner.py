@@ -7,7 +7,7 @@ import importlib
 # List of script paths (relative or absolute)
 scripts = [
     "DA_move_auth_user_to_db.py",
-    "DB_update_user_type_for_admins_in_db.py",
+    # "DB_update_user_type_for_admins_in_db.py",  # user_type kept by triggers; manual repair only
 ]
 
 for script_path in scripts:
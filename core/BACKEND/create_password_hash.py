@@ -1,13 +1,18 @@
 #!/usr/bin/env python3
 """Helper script to generate password hashes for users"""
+import os
 import sys
 sys.dont_write_bytecode = True
+# Adjust path to import core
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from werkzeug.security import generate_password_hash
+from dotenv import load_dotenv
+load_dotenv()
+from core.passwords import hash_password
 
 def create_hash(password):
-    """Generate password hash"""
-    return generate_password_hash(password, method='scrypt')
+    """Generate password hash with the app's PASSWORD_HASH_METHOD"""
+    return hash_password(password)
 
 if __name__ == '__main__':
     # Create hashes for initial users
@@ -10,12 +10,88 @@ import hmac
 import hashlib
 import subprocess
 import threading
+import json
+import time
+import urllib.request
 
 PORT = 9002
 SECRET = os.environ.get("AUTOUPDATE_WEBHOOK_FROM_GITHUB", "").encode("utf-8")
 HOST_PROJECT_DIR = os.environ.get("HOST_PROJECT_DIR", "/home/administrator/projects/nakama")
+APP_CONTAINER = os.environ.get("APP_CONTAINER", "flask_app")
+APP_HEALTH_URL = os.environ.get("APP_HEALTH_URL", "http://flask_app:5002/healthz")
+READY_TIMEOUT = int(os.environ.get("READY_TIMEOUT", "60"))   # seconds to wait for new workers
+# Containers running scripts from the same code volume; restarted once the app is healthy on the new code
+WORKER_CONTAINERS = [c for c in os.environ.get("WORKER_CONTAINERS", "claims_worker,db_backup").split(",") if c]
+SIGNAL_INTERVAL = 0.3   # gunicorn queues at most 5 pending signals; pace TTIN/TTOU
 UpdateLock = threading.Lock()
 
+def probe_app():
+    """Return the app's /healthz JSON, or None if it is not answering."""
+    try:
+        with urllib.request.urlopen(APP_HEALTH_URL, timeout=2) as resp:
+            if resp.status == 200:
+                return json.loads(resp.read().decode("utf-8"))
+    except Exception:
+        pass
+    return None
+
+def signal_app(sig, times=1):
+    """Send a signal to the gunicorn master (PID 1 of the app container)."""
+    for _ in range(times):
+        subprocess.check_call(["docker", "kill", f"--signal={sig}", APP_CONTAINER], stdout=subprocess.DEVNULL)
+        time.sleep(SIGNAL_INTERVAL)
+
+def wait_for_revision(revision, workers, timeout):
+    """
+    Poll /healthz until `workers` workers running `revision` have booted. Its "ready"
+    counts every worker, not just the one answering. Returns how many were ready.
+    """
+    deadline = time.time() + timeout
+    ready = 0
+    while time.time() < deadline:
+        health = probe_app()
+        if health:
+            ready = (health.get("ready") or {}).get(revision, 0)
+            if ready >= workers:
+                break
+        time.sleep(0.5)
+    return ready
+
+def rolling_reload(revision):
+    """
+    Zero-downtime reload: start a full set of new workers (they import the pulled code),
+    wait until all of them have booted, then retire the old workers. Old workers keep
+    serving until then, so capacity never drops below a full set.
+    gunicorn's TTOU stops the oldest workers first, and they drain in-flight requests.
+    Returns False when the caller should fall back to a container restart.
+    """
+    health = probe_app()
+    if not health or not health.get("workers"):
+        print("App is not answering /healthz; cannot do a rolling reload.", flush=True)
+        return False
+    workers = health["workers"]
+
+    print(f"Starting {workers} new workers...", flush=True)
+    signal_app("TTIN", workers)
+    ready = wait_for_revision(revision, workers, READY_TIMEOUT)
+    if ready < workers:
+        print(f"Only {ready}/{workers} new workers booted {revision[:8]} within {READY_TIMEOUT}s.", flush=True)
+        signal_app("TTOU", workers)  # drop the extra workers again before falling back
+        return False
+
+    print(f"New workers ready; retiring {workers} old workers...", flush=True)
+    signal_app("TTOU", workers)
+    return True
+
+def restart_workers():
+    """Restart the background containers so they also run the pulled code (they only load it at start)."""
+    for container in WORKER_CONTAINERS:
+        print(f"Restarting {container}...", flush=True)
+        try:
+            subprocess.check_call(["docker", "restart", container], stderr=subprocess.STDOUT)
+        except subprocess.CalledProcessError as e:
+            print(f"Could not restart {container}: {e}", flush=True)
+
 class WebhookHandler(http.server.BaseHTTPRequestHandler):
     def do_POST(self):
         if self.path != "/push_and_update_server":
@@ -67,14 +143,34 @@ class WebhookHandler(http.server.BaseHTTPRequestHandler):
 
             # Execute git pull
             print("Step 1: Running git pull...", flush=True)
+            old_revision = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd="/app", text=True).strip()
             subprocess.check_call(["git", "pull"], cwd="/app", stderr=subprocess.STDOUT)
+            revision = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd="/app", text=True).strip()
+            if revision == old_revision:
+                print("Already up to date. Nothing to reload.", flush=True)
+                return
 
-            # Restart flask_app to pick up new code (no rebuild needed since code is volume-mounted)
-            print("Step 2: Restarting flask_app container...", flush=True)
-            subprocess.check_call(
-                ["docker", "restart", "flask_app"],
-                stderr=subprocess.STDOUT
-            )
+            # Roll gunicorn workers onto the new code (no rebuild needed since code is volume-mounted)
+            print("Step 2: Rolling reload of flask_app workers...", flush=True)
+            try:
+                reloaded = rolling_reload(revision)
+            except subprocess.CalledProcessError as e:
+                print(f"Rolling reload failed: {e}", flush=True)
+                reloaded = False
+
+            if not reloaded:
+                print(f"Step 2b: Falling back to restarting {APP_CONTAINER} container...", flush=True)
+                subprocess.check_call(
+                    ["docker", "restart", APP_CONTAINER],
+                    stderr=subprocess.STDOUT
+                )
+                reloaded = wait_for_revision(revision, 1, READY_TIMEOUT) > 0
+
+            if reloaded:
+                print("Step 3: Restarting background workers...", flush=True)
+                restart_workers()
+            else:
+                print(f"{APP_CONTAINER} is not healthy on {revision[:8]}; background workers keep the old code.", flush=True)
 
             print("=" * 80, flush=True)
             print("Update completed successfully!", flush=True)
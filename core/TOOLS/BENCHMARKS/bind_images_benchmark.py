@@ -0,0 +1,75 @@
+"""
+Time AQ_create_images_names (image-to-card binding) on a synthetic DB.
+
+    python core/TOOLS/BENCHMARKS/bind_images_benchmark.py [--cards 100000] [--images 100000]
+
+Copies the synthetic DB for --cards (synthetic_db.py), clears image_filename on
+the last --images cards, and drops --images new uploads (upload_NNNNNNN.png,
+hard links to one PNG) into a fresh image folder next to it. Then runs the stage
+once and checks every card got its file.
+"""
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import argparse
+# Adjust path to import core
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'core', 'BACKEND', 'A_create_cards'))
+from synthetic_db import DEFAULT_OUT, LINKS_PER_FILE, PNG_1PX, build_synthetic_db
+import core.database as database
+
+def prepare(cards, images, out):
+    """Private DB copy with `images` unbound cards, and a folder holding `images` unbound files."""
+    info = build_synthetic_db(cards, max(10, cards // 100), out)
+    run_db = info['db'].replace('.db', '-bind.db')
+    shutil.copyfile(info['db'], run_db)
+    conn = sqlite3.connect(run_db)
+    with conn:
+        conn.execute('UPDATE cards SET image_filename = NULL WHERE card_id IN '
+                     '(SELECT card_id FROM cards ORDER BY card_id DESC LIMIT ?)', (images,))
+    conn.close()
+
+    folder = os.path.join(out, f'bind-{cards}')
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+    for i in range(images):
+        # filesystems cap links per inode, so a new source file every LINKS_PER_FILE uploads
+        source = os.path.join(folder, f'.upload-{i // LINKS_PER_FILE}.png')
+        if i % LINKS_PER_FILE == 0:
+            with open(source, 'wb') as f:
+                f.write(PNG_1PX)
+        os.link(source, os.path.join(folder, f'upload_{i:07d}.png'))
+    return run_db, folder
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, default=100_000)
+    parser.add_argument('--images', type=int, default=100_000, help='unbound cards and new image files')
+    parser.add_argument('--out', default=DEFAULT_OUT)
+    args = parser.parse_args()
+    images = min(args.images, args.cards)
+
+    run_db, folder = prepare(args.cards, images, args.out)
+    database.DB_PATH = run_db
+    os.environ['CARDS_BANK_FOLDER'] = folder
+    from AQ_create_images_names import bind_images
+    from core.config import config
+    config.clear()
+
+    start = time.perf_counter()
+    bind_images()
+    elapsed = time.perf_counter() - start
+
+    conn = sqlite3.connect(run_db)
+    unbound = conn.execute('SELECT COUNT(*) FROM cards WHERE image_filename IS NULL').fetchone()[0]
+    conn.close()
+    renamed = sum(1 for name in os.listdir(folder) if name.startswith('Card_'))
+    print(f"{images} images onto {args.cards} cards: {elapsed:.2f}s, {renamed} files renamed, "
+          f"{unbound} cards still unbound")
+    sys.exit(0 if renamed == images and unbound == 0 else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Import-time report for the pipeline stages, core modules and the app (python -X importtime).
+
+    python core/TOOLS/BENCHMARKS/import_time.py [--repeat 5] [--report import_time.json] [--budget-ms 150]
+
+Each target is imported in a fresh interpreter, --repeat times; the median of its
+cumulative import time is reported with its heaviest dependencies. Importing a
+stage must not pull in the libraries only some stages use (HEAVY) or Flask: those
+belong inside the stage functions. Exits 1 when a stage does, or when a stage or
+core module goes over --budget-ms.
+"""
+import os
+import re
+import sys
+import glob
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+BACKEND = os.path.join(ROOT, 'core', 'BACKEND')
+
+HEAVY = {'pandas', 'numpy', 'PIL', 'qrcode', 'requests', 'flask', 'werkzeug', 'jinja2', 'prometheus_client'}
+CORE_MODULES = ['core.config', 'core.database', 'core.transfers', 'core.backup']
+APP_MODULES = ['run']
+BUDGET_MS = 150.0  # max import time of a stage or core module; tests/test_import_time.py holds CI to it
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+# run.py refuses to import without these; values only matter for the import itself
+APP_ENV = {'SESSION_SECRET': 'import-time', 'PORT': '0', 'TEMPLATE_FOLDER': 'core/FRONTEND',
+           'CARDS_BANK_FOLDER': 'core/data/cards_bank', 'AUTH_USERS': 'core/data/users_auth.csv',
+           'SYSTEM_FULL_DB_CSV': 'core/data/system_full_db.csv'}
+
+def stage_targets():
+    """(label, directory, module) for every lettered BACKEND stage script (runners excluded)."""
+    targets = []
+    for path in sorted(glob.glob(os.path.join(BACKEND, '*', '[A-Z][A-Z]_*.py'))):
+        rel = os.path.relpath(path, ROOT)
+        targets.append((rel, os.path.dirname(path), os.path.splitext(os.path.basename(path))[0]))
+    return targets
+
+def import_once(directory, module):
+    """Import module in a fresh interpreter; returns ({module: (self_us, cumulative_us)}, top-level us, error)."""
+    code = f'import sys; sys.path.insert(0, {directory!r}); import {module}'
+    env = {**APP_ENV, **os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+    modules, total = {}, None
+    for line in proc.stderr.splitlines():
+        m = LINE.match(line)
+        if not m:
+            continue
+        self_us, cumulative_us, indent, name = int(m[1]), int(m[2]), m[3], m[4]
+        modules[name] = (self_us, cumulative_us)
+        if name == module and indent == ' ':
+            total = cumulative_us
+    error = None
+    if proc.returncode != 0:
+        error = (proc.stderr.strip().splitlines() or ['exit status %d' % proc.returncode])[-1]
+    return modules, total, error
+
+def measure(directory, module, repeat):
+    runs, modules, error = [], {}, None
+    for _ in range(repeat):
+        modules, total, error = import_once(directory, module)
+        if error or total is None:
+            break
+        runs.append(total)
+    roots = {name.split('.')[0] for name in modules}
+    # heaviest third-party / stdlib packages this import pulled in, by their own cumulative time
+    top = sorted(((modules[r][1], r) for r in roots if r in modules and r != module), reverse=True)[:5]
+    return {
+        'ms': round(statistics.median(runs) / 1000, 1) if runs else None,
+        'error': error,
+        'heavy': sorted(roots & HEAVY),
+        'top': [{'module': name, 'ms': round(us / 1000, 1)} for us, name in top],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS, help='max import time of a stage or core module')
+    parser.add_argument('--report', help='write the results as JSON')
+    args = parser.parse_args()
+
+    targets = [(label, d, m, 'stage') for label, d, m in stage_targets()]
+    targets += [(m, ROOT, m, 'core') for m in CORE_MODULES] + [(m, ROOT, m, 'app') for m in APP_MODULES]
+    results, failures = {}, []
+    print(f"{'target':<62}{'ms':>8}  heaviest imports")
+    for label, directory, module, kind in targets:
+        r = results[label] = {'kind': kind, **measure(directory, module, args.repeat)}
+        ms = f"{r['ms']:.1f}" if r['ms'] is not None else 'error'
+        detail = r['error'] or ', '.join(f"{t['module']} {t['ms']:.0f}" for t in r['top'][:3])
+        print(f"{label:<62}{ms:>8}  {detail}")
+        if kind == 'stage' and r['heavy']:
+            failures.append(f"{label} imports {', '.join(r['heavy'])} at module level")
+        if kind != 'app' and r['ms'] is not None and r['ms'] > args.budget_ms:
+            failures.append(f"{label} takes {r['ms']:.0f} ms to import (budget {args.budget_ms:.0f} ms)")
+        if r['error']:
+            failures.append(f"{label} fails to import: {r['error']}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'budget_ms': args.budget_ms, 'targets': results, 'failures': failures}, f, indent=2)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Encode time and peak memory of the /get_users payload, old jsonify path vs FastJSONProvider.
+
+    python core/TOOLS/BENCHMARKS/json_encode_benchmark.py [rows]
+
+Rows are copies of the cards in nakama.db (read-only), loaded into an in-memory DB.
+Peak memory is what tracemalloc sees on the Python heap while encoding.
+"""
+import os
+import sys
+import time
+import sqlite3
+import tracemalloc
+# Adjust path to import core
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from core.database import db_path
+import core.json_provider as json_provider
+from core.json_provider import Columnar, FastJSONProvider
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+REPEAT = 5
+
+def load_rows(count):
+    """Fill an in-memory cards table with `count` rows cycled from the real DB."""
+    src = sqlite3.connect(f'file:{db_path()}?mode=ro', uri=True)
+    mem = sqlite3.connect(':memory:')
+    mem.execute(src.execute("SELECT sql FROM sqlite_master WHERE name = 'cards'").fetchone()[0])
+    cols = [r[1] for r in src.execute('PRAGMA table_info(cards)')]
+    sample = src.execute('SELECT * FROM cards').fetchall()
+    src.close()
+    if not sample:
+        raise SystemExit('cards table is empty, nothing to benchmark')
+    id_idx = cols.index('card_id')
+    rows = []
+    for i in range(count):
+        row = list(sample[i % len(sample)])
+        row[id_idx] = f'Card_{i:07d}'
+        rows.append(row)
+    mem.executemany(f"INSERT INTO cards VALUES ({', '.join('?' * len(cols))})", rows)
+    mem.row_factory = sqlite3.Row
+    return mem.execute('SELECT * FROM cards').fetchall()
+
+def old_jsonify(app, recs):
+    # what /get_users did before: a dict per row, then the stdlib encoder with sorted keys
+    return app.json.response({'columns': list(recs[0].keys()), 'records': [dict(r) for r in recs]}).get_data()
+
+def new_records(app, recs):
+    return app.json.response({'columns': list(recs[0].keys()), 'records': recs}).get_data()
+
+def new_columnar(app, recs):
+    return app.json.response(Columnar(recs)).get_data()
+
+def measure(fn, app, recs):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        body = fn(app, recs)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(app, recs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak, len(body)
+
+def main():
+    recs = load_rows(ROWS)
+    stdlib_app, fast_app = Flask('before'), Flask('after')
+    stdlib_app.json = DefaultJSONProvider(stdlib_app)
+    fast_app.json = FastJSONProvider(fast_app)
+
+    cases = [
+        ('before: dicts + stdlib', old_jsonify, stdlib_app),
+        ('after: Rows, records', new_records, fast_app),
+        ('after: Rows, columnar', new_columnar, fast_app),
+    ]
+    if json_provider.orjson is not None:
+        cases.append(('after: columnar, stdlib fallback', None, fast_app))
+
+    print(f"{ROWS} rows, best of {REPEAT}, encoder: {'orjson' if json_provider.orjson else 'stdlib'}")
+    print(f"{'case':<34}{'time ms':>10}{'peak MiB':>10}{'body KiB':>10}")
+    for name, fn, app in cases:
+        if fn is None:
+            # same provider with orjson switched off
+            saved, json_provider.orjson = json_provider.orjson, None
+            try:
+                result = measure(new_columnar, app, recs)
+            finally:
+                json_provider.orjson = saved
+        else:
+            result = measure(fn, app, recs)
+        elapsed, peak, size = result
+        print(f"{name:<34}{elapsed * 1000:>10.1f}{peak / 2**20:>10.1f}{size / 1024:>10.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+"""
+Local load test: create_app() on a synthetic DB, driven by our real traffic mix.
+
+    python core/TOOLS/BENCHMARKS/load_test.py [--cards 10000] [--seconds 60] [--report report.json]
+
+Virtual users, each on its own cycle (first request at a random offset in the cycle):
+  card pollers   logged-in users polling GET /api/cards          (--card-pollers, every 5 s)
+  table pollers  admins polling GET /get_users?layout=columns    (--table-pollers, every 3 s)
+  scanners       anonymous GET /card/<key> QR scans, ~1/3 hit an unclaimed card (--scanners)
+  claimers       scan an unclaimed card, then POST /login, which queues the claim (--claimers)
+  activators     logged-in users POST /activate_card on their own cards (--activators)
+
+The app runs in-process on werkzeug's threaded server, against a synthetic DB
+(synthetic_db.py) that NAKAMA_DB_PATH points every connection at, including the
+claims worker started next to it (DA_move_auth_user_to_db.py --loop). Logins of the virtual users happen before the clock starts.
+With --url the traffic goes to an already running server instead; start it with
+NAKAMA_DB_PATH set to the printed DB so the users and cards exist there.
+
+The report gives throughput, p50/p95/p99/max and status codes per route, printed
+and written as JSON to --report.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import subprocess
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+# Adjust path to import core
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(ROOT)
+from login_benchmark import make_opener, percentile
+from synthetic_db import DEFAULT_OUT, build_synthetic_db, card_key, username
+
+class Recorder:
+    """Latencies and status codes per route, only counted while the clock runs."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.recording = False
+
+    def add(self, route, status, seconds):
+        if not self.recording:
+            return
+        with self.lock:
+            stats = self.routes.setdefault(route, {'latencies': [], 'statuses': {}})
+            stats['latencies'].append(seconds)
+            stats['statuses'][str(status)] = stats['statuses'].get(str(status), 0) + 1
+
+    def summary(self, seconds):
+        out = {}
+        for route, stats in sorted(self.routes.items()):
+            lat = stats['latencies']
+            errors = sum(n for code, n in stats['statuses'].items() if code == 'error' or code.startswith('5'))
+            out[route] = {
+                'requests': len(lat),
+                'rps': round(len(lat) / seconds, 2),
+                'errors': errors,
+                'statuses': stats['statuses'],
+                'p50_ms': round(percentile(lat, 50) * 1000, 2),
+                'p95_ms': round(percentile(lat, 95) * 1000, 2),
+                'p99_ms': round(percentile(lat, 99) * 1000, 2),
+                'max_ms': round(max(lat) * 1000, 2),
+            }
+        return out
+
+class Client:
+    """One virtual user: a cookie jar, redirects not followed (302 is an answer, not a hop)."""
+
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.opener = make_opener(follow_redirects=False)
+
+    def request(self, route, path, data=None, json_body=None):
+        headers = {}
+        if json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            data = urllib.parse.urlencode(data).encode()
+        req = urllib.request.Request(f'{self.base_url}{path}', data=data, headers=headers)
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=60) as resp:
+                resp.read()
+                status = resp.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            status = e.code
+        except (urllib.error.URLError, OSError):
+            status = 'error'
+        self.recorder.add(route, status, time.perf_counter() - start)
+        return status
+
+    def login(self, user, password, route='login'):
+        """POST /login until it isn't throttled (503 while the KDF queue is full); True on 302."""
+        for attempt in range(20):
+            status = self.request(route, '/login', data={'username': user, 'password': password})
+            if status != 503:
+                return status == 302
+            time.sleep(0.1 * (attempt + 1))
+        return False
+
+def pick_cards(db_path):
+    """Unclaimed card keys (for scanners/claimers) and each user's not yet active cards."""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        unclaimed = [r[0] for r in conn.execute("SELECT card_keys FROM cards WHERE owner = 'SYSTEM'")]
+        inactive = {}
+        for owner, card_id in conn.execute("SELECT owner, card_id FROM cards WHERE status = 'STATUS_2'"):
+            inactive.setdefault(owner, []).append(card_id)
+        max_key = conn.execute('SELECT COUNT(*) FROM cards').fetchone()[0]
+    finally:
+        conn.close()
+    return unclaimed, inactive, max_key
+
+def create_bench_app(info, cards_folder):
+    """create_app() with every connection (and spawned BACKEND script) on the synthetic DB."""
+    os.chdir(ROOT)  # template paths are relative to the repo
+    os.environ['NAKAMA_DB_PATH'] = info['db']
+    os.environ['CARDS_BANK_FOLDER'] = cards_folder
+    os.environ['CARDS_THUMBS_FOLDER'] = os.path.join(cards_folder, 'thumbs')
+    for name, value in {
+        'SESSION_SECRET': 'load-test', 'PORT': '0', 'TEMPLATE_FOLDER': 'core/FRONTEND',
+        'AUTH_USERS': os.path.join(os.path.dirname(info['db']), 'users_auth.csv'),
+        'SYSTEM_FULL_DB_CSV': os.path.join(os.path.dirname(info['db']), 'system_full_db.csv'),
+    }.items():
+        os.environ.setdefault(name, value)
+    import core.database
+    core.database.DB_PATH = info['db']
+    from run import create_app
+    return create_app()
+
+def start_app(info, cards_folder):
+    """create_bench_app() on werkzeug's threaded server on a free local port; returns (server, base_url)."""
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, create_bench_app(info, cards_folder), threaded=True)
+    threading.Thread(target=server.serve_forever, name='load-test-server', daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+def start_claims_worker(info):
+    """The claims_worker service on the synthetic DB, as a subprocess; terminate() it when done."""
+    script = os.path.join(ROOT, 'core', 'BACKEND', 'D_change_card_owner', 'DA_move_auth_user_to_db.py')
+    return subprocess.Popen([sys.executable, script, '--loop'], cwd=ROOT,
+                            env={**os.environ, 'NAKAMA_DB_PATH': info['db']}, stdout=subprocess.DEVNULL)
+
+def run_load(base_url, info, args):
+    recorder = Recorder()
+    unclaimed, inactive, max_key = pick_cards(info['db'])
+    random.shuffle(unclaimed)
+    claim_lock = threading.Lock()
+    stop = threading.Event()
+    ready = threading.Barrier(
+        args.card_pollers + args.table_pollers + args.scanners + args.claimers + args.activators + 1
+    )
+    owners = [u for u in sorted(inactive, key=lambda u: -len(inactive[u])) if u != 'SYSTEM']
+
+    def cycle(interval, action):
+        # each virtual user starts at its own offset, then keeps its period
+        next_at = time.monotonic() + random.uniform(0, interval)
+        while not stop.is_set():
+            stop.wait(max(0, next_at - time.monotonic()))
+            if stop.is_set():
+                return
+            action()
+            next_at = max(next_at + interval, time.monotonic())
+
+    def card_poller(i):
+        client = Client(base_url, recorder)
+        client.login(username(1 + i % max(1, info['users'] - 1)), info['password'])
+        ready.wait()
+        cycle(args.card_poll_interval, lambda: client.request('GET /api/cards', '/api/cards'))
+
+    def table_poller(i):
+        client = Client(base_url, recorder)
+        client.login(username(0), info['password'])  # user0 is the synthetic ADMIN
+        ready.wait()
+        cycle(args.table_poll_interval,
+              lambda: client.request('GET /get_users', '/get_users?layout=columns'))
+
+    def scanner(i):
+        client = Client(base_url, recorder)
+        ready.wait()
+        cycle(args.scan_interval,
+              lambda: client.request('GET /card/<key>', f'/card/{card_key(random.randrange(max_key))}'))
+
+    def claimer(i):
+        ready.wait()
+
+        def claim():
+            with claim_lock:
+                key = unclaimed.pop() if unclaimed else None
+            if key is None:
+                return
+            client = Client(base_url, recorder)  # a fresh visitor per claim
+            client.request('GET /card/<key> (claim)', f'/card/{key}')
+            client.login(username(random.randrange(info['users'])), info['password'], 'POST /login (claim)')
+        cycle(args.claim_interval, claim)
+
+    def activator(i):
+        client = Client(base_url, recorder)
+        owner = owners[i % len(owners)] if owners else None
+        if owner:
+            client.login(owner, info['password'])
+        todo = list(inactive.get(owner, []))
+        ready.wait()
+
+        def activate():
+            # cards already activated answer "Already active"; that's still a full request
+            card_id = todo.pop() if todo else random.choice(inactive.get(owner) or ['Card_missing'])
+            client.request('POST /activate_card', '/activate_card', json_body={'card_id': card_id})
+        cycle(args.activate_interval, activate)
+
+    kinds = [(card_poller, args.card_pollers), (table_poller, args.table_pollers), (scanner, args.scanners),
+             (claimer, args.claimers), (activator, args.activators)]
+    threads = [threading.Thread(target=fn, args=(i,), daemon=True) for fn, n in kinds for i in range(n)]
+    print(f"Logging in {args.card_pollers + args.table_pollers + args.activators} virtual users...", flush=True)
+    for t in threads:
+        t.start()
+    ready.wait()
+    recorder.recording = True
+    started = time.perf_counter()
+    print(f"Running {len(threads)} virtual users for {args.seconds:.0f}s...", flush=True)
+    time.sleep(args.seconds)
+    stop.set()
+    recorder.recording = False
+    elapsed = time.perf_counter() - started
+    for t in threads:
+        t.join(timeout=60)
+    return recorder.summary(elapsed), elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, default=10_000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--out', default=DEFAULT_OUT, help='where synthetic DBs are built and cached')
+    parser.add_argument('--url', help='target a running server instead of starting create_app() here')
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--card-pollers', type=int, default=50)
+    parser.add_argument('--card-poll-interval', type=float, default=5)
+    parser.add_argument('--table-pollers', type=int, default=3)
+    parser.add_argument('--table-poll-interval', type=float, default=3)
+    parser.add_argument('--scanners', type=int, default=5)
+    parser.add_argument('--scan-interval', type=float, default=2)
+    parser.add_argument('--claimers', type=int, default=1)
+    parser.add_argument('--claim-interval', type=float, default=10)
+    parser.add_argument('--activators', type=int, default=5)
+    parser.add_argument('--activate-interval', type=float, default=5)
+    parser.add_argument('--report', help='JSON report path (default: <out>/load-report-<time>.json)')
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    # a fresh copy per run: claims and activations change the DB
+    info = build_synthetic_db(args.cards, args.users, args.out, images=True, seed=args.seed)
+    run_db = info['db'].replace('.db', '-run.db')
+    shutil.copyfile(info['db'], run_db)
+    info = {**info, 'db': run_db}
+    print(f"Synthetic DB: {run_db} ({info['cards']} cards, {info['users']} users)", flush=True)
+
+    server = worker = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+    else:
+        server, base_url = start_app(info, info['images'])
+        worker = start_claims_worker(info)
+    try:
+        routes, elapsed = run_load(base_url, info, args)
+    finally:
+        if server is not None:
+            server.shutdown()
+        if worker is not None:
+            worker.terminate()
+            worker.wait()
+
+    report = {
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'target': args.url or 'in-process create_app (werkzeug threaded)',
+        'seconds': round(elapsed, 1),
+        'db': {'cards': info['cards'], 'users': info['users'], 'seed': args.seed},
+        'mix': {name: getattr(args, name) for name in (
+            'card_pollers', 'card_poll_interval', 'table_pollers', 'table_poll_interval', 'scanners',
+            'scan_interval', 'claimers', 'claim_interval', 'activators', 'activate_interval')},
+        'routes': routes,
+    }
+    path = args.report or os.path.join(args.out, f"load-report-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'route':<28}{'req':>7}{'req/s':>8}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for route, r in routes.items():
+        print(f"{route:<28}{r['requests']:>7}{r['rps']:>8.1f}{r['errors']:>5}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}")
+    print(f"Report: {path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Login throughput and /api/cards latency while logins are under load.
+
+    python core/TOOLS/BENCHMARKS/login_benchmark.py --url http://localhost:5002 \\
+        --user user1 --password user1 [--login-threads 8] [--poll-threads 4] [--seconds 20]
+
+Login threads POST /login in a loop; poll threads stay logged in and GET /api/cards.
+Run it once with --login-threads 0 for the baseline /api/cards latency.
+"""
+import sys
+import time
+import argparse
+import threading
+import http.cookiejar
+import urllib.error
+import urllib.parse
+import urllib.request
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None  # a successful login answers 302; don't follow it to /profile
+
+def make_opener(follow_redirects=True):
+    handlers = [urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())]
+    if not follow_redirects:
+        handlers.append(NoRedirect())
+    return urllib.request.build_opener(*handlers)
+
+def login(opener, url, user, password):
+    """POST /login; True on success (302), False on a rejected or throttled login."""
+    data = urllib.parse.urlencode({'username': user, 'password': password}).encode()
+    try:
+        with opener.open(f'{url}/login', data=data, timeout=30) as resp:
+            return False  # 200 means the login page came back with an error
+    except urllib.error.HTTPError as e:
+        return e.code == 302
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5002')
+    parser.add_argument('--user', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--login-threads', type=int, default=8)
+    parser.add_argument('--poll-threads', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=20)
+    args = parser.parse_args()
+    url = args.url.rstrip('/')
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {'logins': 0, 'login_failures': 0, 'polls': [], 'poll_errors': 0}
+
+    def login_loop():
+        opener = make_opener(follow_redirects=False)
+        while not stop.is_set():
+            ok = login(opener, url, args.user, args.password)
+            with lock:
+                stats['logins' if ok else 'login_failures'] += 1
+
+    def poll_loop():
+        opener = make_opener(follow_redirects=False)
+        if not login(opener, url, args.user, args.password):
+            sys.exit('poll thread could not log in')
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with opener.open(f'{url}/api/cards', timeout=30) as resp:
+                    resp.read()
+                with lock:
+                    stats['polls'].append(time.perf_counter() - start)
+            except (urllib.error.URLError, OSError):
+                with lock:
+                    stats['poll_errors'] += 1
+
+    threads = [threading.Thread(target=login_loop, daemon=True) for _ in range(args.login_threads)]
+    threads += [threading.Thread(target=poll_loop, daemon=True) for _ in range(args.poll_threads)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join(timeout=30)
+
+    polls = stats['polls']
+    print(f"{args.login_threads} login threads, {args.poll_threads} poll threads, {args.seconds:.0f}s")
+    print(f"logins/s:        {stats['logins'] / args.seconds:.1f} "
+          f"({stats['logins']} ok, {stats['login_failures']} rejected/throttled)")
+    print(f"/api/cards req/s: {len(polls) / args.seconds:.1f} ({stats['poll_errors']} errors)")
+    print(f"/api/cards p50:  {percentile(polls, 50) * 1000:.1f} ms")
+    print(f"/api/cards p99:  {percentile(polls, 99) * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+"""
+Micro-benchmarks of the routes.py data functions on 1k / 100k / 1M-card synthetic DBs.
+
+    python core/TOOLS/BENCHMARKS/micro_benchmarks.py [--sizes 1000,100000,1000000] --save-baseline
+    python core/TOOLS/BENCHMARKS/micro_benchmarks.py --compare [--threshold 15]
+
+Each size runs in its own process, on a DB and card image directory of that size
+(synthetic_db.py, cached in --out). Every case gets a warm-up call, then timed
+calls until --repeat runs or --budget seconds; state a case changes (the card
+cache, an activated card) is reset between calls, outside the timing.
+
+--save-baseline writes the results to --baseline. --compare checks a run against
+it and exits 1 when a case is more than --threshold percent (and --min-delta-ms)
+slower. The fastest run is compared by default: on a shared machine it moves far
+less between runs than the median (--stat median is available). Baselines only compare on the machine that wrote them:
+host details are stored with them and a mismatch is reported.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import platform
+import tempfile
+import argparse
+import statistics
+import subprocess
+# Adjust path to import core
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+from synthetic_db import DEFAULT_OUT, build_synthetic_db, card_key
+
+SIZES = [1_000, 100_000, 1_000_000]
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'micro_benchmarks.json')
+
+def users_for(cards):
+    return max(10, cards // 100)
+
+def host_info():
+    return {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'node': platform.node(),
+    }
+
+def measure(fn, setup=None, repeat=15, budget=5.0):
+    """Warm up once, then time fn() up to `repeat` times (at least 3) within `budget` seconds."""
+    if setup:
+        setup()
+    fn()
+    times = []
+    deadline = time.perf_counter() + budget
+    gc.collect()
+    while len(times) < repeat and (len(times) < 3 or time.perf_counter() < deadline):
+        if setup:
+            setup()
+        gc.disable()
+        start = time.perf_counter_ns()
+        fn()
+        elapsed = time.perf_counter_ns() - start
+        gc.enable()
+        times.append(elapsed / 1e6)
+    quartiles = statistics.quantiles(times, n=4) if len(times) > 1 else [times[0]] * 3
+    return {
+        'runs': len(times),
+        'median_ms': round(statistics.median(times), 4),
+        'mean_ms': round(statistics.fmean(times), 4),
+        'min_ms': round(min(times), 4),
+        'iqr_ms': round(quartiles[2] - quartiles[0], 4),
+        'stdev_ms': round(statistics.stdev(times), 4) if len(times) > 1 else 0.0,
+    }
+
+def pick_subjects(db_path):
+    """The heaviest card owner, one of their cards, and the last unclaimed card (worst case for scans)."""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        owner = conn.execute(
+            "SELECT owner FROM cards WHERE owner != 'SYSTEM' GROUP BY owner ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()[0]
+        card_id = conn.execute('SELECT card_id FROM cards WHERE owner = ? ORDER BY card_id LIMIT 1',
+                               (owner,)).fetchone()[0]
+        unclaimed = conn.execute(
+            "SELECT CAST(substr(card_id, 6) AS INTEGER) FROM cards WHERE owner = 'SYSTEM' "
+            "ORDER BY card_id DESC LIMIT 1"
+        ).fetchone()[0]
+        owned_cards = conn.execute('SELECT COUNT(*) FROM cards WHERE owner = ?', (owner,)).fetchone()[0]
+    finally:
+        conn.close()
+    return owner, card_id, card_key(unclaimed), owned_cards
+
+def prepare(cards, out):
+    """Synthetic DB, image dir and the private copy the cases run on (activate_card writes to it)."""
+    info = build_synthetic_db(cards, users_for(cards), out, images=True)
+    run_db = info['db'].replace('.db', '-micro.db')
+    if not os.path.exists(run_db) or os.path.getmtime(run_db) < os.path.getmtime(info['db']):
+        shutil.copyfile(info['db'], run_db)
+    return {**info, 'db': run_db}
+
+def run_size(cards, args):
+    """All cases on one DB size, in this process; returns {case: stats}."""
+    info = prepare(cards, args.out)
+    run_db = info['db']
+
+    from load_test import create_bench_app
+    app = create_bench_app(info, info['images'])
+    import routes
+    from core.card_cache import card_cache
+    owner, card_id, unclaimed_key, owned_cards = pick_subjects(run_db)
+
+    reset = sqlite3.connect(run_db, isolation_level=None)
+    def deactivate():
+        reset.execute("UPDATE cards SET status = 'STATUS_2' WHERE card_id = ?", (card_id,))
+
+    def activate():
+        with app.test_request_context('/activate_card', method='POST', json={'card_id': card_id}):
+            routes.session['user'] = {'username': owner}
+            routes.activate_card()
+
+    def scan():
+        with app.test_request_context(f'/card/{unclaimed_key}'):
+            routes.serve_card_page(unclaimed_key)
+
+    cases = [
+        ('get_user_cards (cold cache)', lambda: routes.get_user_cards(owner), card_cache.clear),
+        ('get_user_cards (warm cache)', lambda: routes.get_user_cards(owner), None),
+        ('load_records_from_db', routes.load_records_from_db, None),
+        ('authenticate_user', lambda: routes.authenticate_user(owner, info['password']), None),
+        ('determine_user_is_admin', lambda: routes.determine_user_is_admin(owner), None),
+        ('serve_card_page lookup', scan, None),
+        ('activate_card', activate, deactivate),
+    ]
+    results = {}
+    # one request context for the plain function calls, so get_db() reuses its connection like a request does
+    with app.test_request_context('/'):
+        for name, fn, setup in cases:
+            if args.only and not any(part in name for part in args.only):
+                continue
+            results[name] = measure(fn, setup, args.repeat, args.budget)
+            print(f"  {cards:>9} {name:<30}{results[name]['median_ms']:>12.3f} ms  "
+                  f"(iqr {results[name]['iqr_ms']:.3f}, n={results[name]['runs']})", file=sys.stderr, flush=True)
+    reset.close()
+    return {'owner_cards': owned_cards, 'cases': results}
+
+def compare(current, baseline, threshold, min_delta_ms, stat='min'):
+    """Cases slower than the baseline (by `stat`, min or median) by more than threshold % and min_delta_ms."""
+    regressions = []
+    for size, result in current['sizes'].items():
+        base_cases = baseline['sizes'].get(size, {}).get('cases', {})
+        for name, stats in result['cases'].items():
+            base = base_cases.get(name)
+            if base is None:
+                continue
+            key = f'{stat}_ms'
+            delta = stats[key] - base[key]
+            pct = 100 * delta / base[key] if base[key] else 0.0
+            status = 'REGRESSION' if pct > threshold and delta > min_delta_ms else ('faster' if pct < -threshold else 'ok')
+            print(f"{size:>9} {name:<30}{base[key]:>11.3f}{stats[key]:>11.3f}{pct:>+9.1f}%  {status}")
+            if status == 'REGRESSION':
+                regressions.append((size, name, pct))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help='comma-separated card counts')
+    parser.add_argument('--only', nargs='*', help='run only cases whose name contains one of these')
+    parser.add_argument('--repeat', type=int, default=15, help='timed runs per case')
+    parser.add_argument('--budget', type=float, default=5.0, help='seconds per case before stopping early')
+    parser.add_argument('--out', default=DEFAULT_OUT, help='where synthetic DBs are built and cached')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='write this run as the baseline')
+    parser.add_argument('--compare', action='store_true', help='fail on regressions against the baseline')
+    parser.add_argument('--threshold', type=float, default=15.0, help='allowed slowdown, percent')
+    parser.add_argument('--stat', choices=['min', 'median'], default='min', help='statistic compared')
+    parser.add_argument('--min-delta-ms', type=float, default=0.05, help='ignore slowdowns smaller than this')
+    parser.add_argument('--results', help='also write this run to a JSON file')
+    parser.add_argument('--child-size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--child-output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child_size:
+        result = run_size(args.child_size, args)
+        with open(args.child_output, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return
+
+    # each size in a fresh process: no caches, connections or memory carried over
+    current = {'host': host_info(), 'threshold': args.threshold, 'sizes': {}}
+    forwarded = ['--repeat', str(args.repeat), '--budget', str(args.budget), '--out', args.out]
+    if args.only:
+        forwarded += ['--only', *args.only]
+    sizes = [int(s) for s in args.sizes.split(',')]
+    # build and copy everything first, and flush it, so no case is timed during disk writeback
+    for size in sizes:
+        prepare(size, args.out)
+    os.sync()
+    for size in sizes:
+        print(f"{size} cards:", file=sys.stderr, flush=True)
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--child-size', str(size),
+                            '--child-output', output.name, *forwarded], check=True)
+            current['sizes'][str(size)] = json.load(output)
+
+    if args.results:
+        with open(args.results, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    if args.compare:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['host'] != current['host']:
+            print(f"Warning: baseline was recorded on {baseline['host']}, this is {current['host']}")
+        print(f"{'cards':>9} {'case':<30}{'base ms':>11}{'now ms':>11}{'change':>10}  ({args.stat})")
+        regressions = compare(current, baseline, args.threshold, args.min_delta_ms, args.stat)
+        if regressions:
+            print(f"{len(regressions)} case(s) more than {args.threshold}% slower than the baseline")
+            sys.exit(1)
+        print('No regressions.')
+
+if __name__ == '__main__':
+    main()
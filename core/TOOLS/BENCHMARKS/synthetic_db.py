@@ -0,0 +1,151 @@
+"""
+Synthetic nakama.db (and optional card image directory) for load tests and benchmarks.
+
+    python core/TOOLS/BENCHMARKS/synthetic_db.py --cards 100000 [--users 1000] [--images] [--out DIR]
+
+Built with init_db(), so it has the current schema, indexes and triggers. Every user
+has password BENCH_PASSWORD and user0 is ADMIN. Cards come in packs of PACK_SIZE;
+about a third are still owned by SYSTEM with a /card/<key> URL, so QR scans and
+claims have something to find. Databases are cached by size in --out and reused.
+"""
+import os
+import sys
+import json
+import random
+import sqlite3
+import argparse
+import time
+# Adjust path to import core
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+import core.database as database
+from core.passwords import hash_password
+
+BENCH_PASSWORD = 'bench-password'
+BENCH_URL = 'https://nakama.local'
+DEFAULT_OUT = os.path.join('/tmp', 'nakama_bench')
+PACK_SIZE = 5
+SYSTEM_SHARE = 0.34   # cards still unclaimed
+ACTIVE_SHARE = 0.5    # owned cards already activated (STATUS_3)
+HASHED_SHARE = 0.9    # cards ingested with an image_hash; the rest are looked up on disk
+BATCH = 50_000
+LINKS_PER_FILE = 50_000
+
+CHAINS = ['Ethereum', 'Cardano', 'Solana', 'Binance Smart Chain', 'Polygon']
+THEMES = ['Design', 'Charity', 'Gaming', 'DeFi', 'Art']
+TYPES = ['Common', 'Rare', 'Legendary', 'Super Legendary', 'Primordial']
+# 1x1 transparent PNG, hard-linked once per card so large image dirs stay cheap
+PNG_1PX = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082'
+)
+
+def card_key(i):
+    return f'bench{i:08d}'
+
+def username(i):
+    return f'user{i}'
+
+def db_path(out, cards, users):
+    return os.path.join(out, f'nakama-{cards}c-{users}u.db')
+
+def image_dir(out, cards):
+    return os.path.join(out, f'cards_bank-{cards}')
+
+def generate_cards(cards, users, seed):
+    """Yield cards rows in insert order (card_id, pack_id, ..., image_hash)."""
+    rng = random.Random(seed)
+    for i in range(cards):
+        pack = i // PACK_SIZE
+        if rng.random() < SYSTEM_SHARE:
+            owner, status = 'SYSTEM', 'STATUS_1'
+        else:
+            # owners are skewed: low-numbered users collect far more cards than the rest
+            owner = username(int(users * rng.random() ** 2))
+            status = 'STATUS_3' if rng.random() < ACTIVE_SHARE else 'STATUS_2'
+        card_id = f'Card_{i:07d}'
+        hashed = rng.random() < HASHED_SHARE
+        yield (
+            card_id, f'Pack_{pack:06d}', f'2025-{1 + pack % 12:02d}-{1 + pack % 28:02d}', owner,
+            'Synthetic card used for benchmarks.', 'BTC, ETH', '1.00, 2.00', f'Bench card {i}',
+            CHAINS[pack % len(CHAINS)], THEMES[pack % len(THEMES)], TYPES[i % len(TYPES)],
+            f'{BENCH_URL}/card/{card_key(i)}', card_key(i), status, '10', '+2',
+            f'{card_id}.png', f'{i:016x}' if hashed else None,
+        )
+
+def build_images(directory, cards):
+    """One hard link to the same 1px PNG per card (files named like the pipeline's)."""
+    os.makedirs(directory, exist_ok=True)
+    for i in range(cards):
+        # a new source file every LINKS_PER_FILE cards: filesystems cap links per inode (ext4: 65000)
+        source = os.path.join(directory, f'.bench-{i // LINKS_PER_FILE}.png')
+        if i % LINKS_PER_FILE == 0 and not os.path.exists(source):
+            with open(source, 'wb') as f:
+                f.write(PNG_1PX)
+        path = os.path.join(directory, f'Card_{i:07d}.png')
+        if not os.path.exists(path):
+            os.link(source, path)
+    return directory
+
+def build_synthetic_db(cards, users=1000, out=DEFAULT_OUT, images=False, seed=0, force=False):
+    """Create (or reuse) the synthetic DB for this size; returns {'db', 'images', 'cards', 'users', ...}."""
+    users = max(1, min(users, cards))
+    os.makedirs(out, exist_ok=True)
+    path = db_path(out, cards, users)
+    info = {'db': path, 'images': image_dir(out, cards) if images else None, 'cards': cards, 'users': users,
+            'password': BENCH_PASSWORD, 'url': BENCH_URL, 'seed': seed}
+    if images:
+        build_images(info['images'], cards)
+    if os.path.exists(path) and not force:
+        return info
+
+    tmp = f'{path}.partial'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    saved, database.DB_PATH = database.DB_PATH, tmp
+    try:
+        database.init_db()
+    finally:
+        database.DB_PATH = saved
+
+    start = time.perf_counter()
+    conn = sqlite3.connect(tmp)
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    # one KDF run for everyone: the hash carries its own salt, so it verifies for every user
+    password = hash_password(BENCH_PASSWORD)
+    with conn:
+        conn.executemany('INSERT INTO users (username, password, role) VALUES (?, ?, ?)',
+                         [(username(i), password, 'ADMIN' if i == 0 else 'USER') for i in range(users)])
+        rows = generate_cards(cards, users, seed)
+        while True:
+            batch = [row for _, row in zip(range(BATCH), rows)]
+            if not batch:
+                break
+            conn.executemany('''
+                INSERT INTO cards (card_id, pack_id, card_date, owner, description, coins, usd_amount, name,
+                                   chain, theme, card_type, card_url, card_keys, status, monster_power,
+                                   power_combat, image_filename, image_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', batch)
+    conn.execute('ANALYZE')
+    conn.execute('PRAGMA journal_mode = DELETE')
+    conn.close()
+    os.replace(tmp, path)
+    with open(f'{path}.json', 'w', encoding='utf-8') as f:
+        json.dump({**info, 'build_seconds': round(time.perf_counter() - start, 1)}, f, indent=2)
+    return info
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, default=100_000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--images', action='store_true', help='also build a matching card image directory')
+    parser.add_argument('--out', default=DEFAULT_OUT)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--force', action='store_true', help='rebuild even if the DB already exists')
+    args = parser.parse_args()
+    info = build_synthetic_db(args.cards, args.users, args.out, args.images, args.seed, args.force)
+    print(json.dumps(info, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+Online backups of nakama.db with sqlite3's backup API.
+
+    python -m core.backup            # one snapshot now (verify + rotate)
+    python -m core.backup --loop     # every BACKUP_INTERVAL_HOURS (the db_backup compose service)
+    python -m core.backup --verify core/data/backups/nakama-20250101-000000-000000.db
+
+Every snapshot records its progress in BACKUP_DIR/.status.json (read_status), so
+the admin endpoint can start one in the background and report on it later.
+Settings come from core.config (environment, then .env).
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows dev machines: only the in-process lock applies
+    fcntl = None
+
+from core.config import config
+from core.database import db_path
+
+PREFIX = 'nakama-'
+SUFFIX = '.db'
+STATUS_FILE = '.status.json'
+
+class BackupError(Exception):
+    """Snapshot failed or didn't pass verification."""
+
+class _TooManyRestarts(Exception):
+    """The paged copy kept restarting because other connections wrote to the DB."""
+
+def default_backup_dir():
+    return config.BACKUP_DIR or os.path.join(os.path.dirname(db_path()), 'backups')
+
+_backup_lock = threading.Lock()
+
+@contextmanager
+def backup_lock(backup_dir):
+    """One snapshot at a time across threads and processes (db_backup service, admin endpoint)."""
+    if not _backup_lock.acquire(blocking=False):
+        raise BackupError('A backup is already running')
+    try:
+        os.makedirs(backup_dir, exist_ok=True)
+        with open(os.path.join(backup_dir, '.lock'), 'w') as lock_file:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise BackupError('A backup is already running') from None
+            yield
+    finally:
+        _backup_lock.release()
+
+class _StepProgress:
+    """backup() progress callback: pauses between steps and gives up after too many restarts."""
+
+    def __init__(self):
+        self.pause = config.BACKUP_STEP_PAUSE_MS / 1000
+        self.max_restarts = config.BACKUP_MAX_RESTARTS
+        self.restarts = 0
+        self.remaining = None
+
+    def __call__(self, status, remaining, total):
+        # A write by another connection restarts the copy: more pages left than after the last step
+        if self.remaining is not None and remaining >= self.remaining:
+            self.restarts += 1
+            if self.restarts > self.max_restarts:
+                raise _TooManyRestarts()
+        self.remaining = remaining
+        # The source is only read-locked while a step copies; sleeping here lets writers commit
+        time.sleep(self.pause)
+
+def verify_snapshot(path):
+    """Open a snapshot read-only and run PRAGMA integrity_check; returns its card count."""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        result = [r[0] for r in conn.execute('PRAGMA integrity_check')]
+        if result != ['ok']:
+            raise BackupError(f"integrity_check failed for {path}: {'; '.join(result[:5])}")
+        return conn.execute('SELECT COUNT(*) FROM cards').fetchone()[0]
+    finally:
+        conn.close()
+
+def list_snapshots(backup_dir=None):
+    """Completed snapshots, newest first."""
+    backup_dir = backup_dir or default_backup_dir()
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [n for n in os.listdir(backup_dir) if n.startswith(PREFIX) and n.endswith(SUFFIX)]
+    return [os.path.join(backup_dir, n) for n in sorted(names, reverse=True)]
+
+def rotate(backup_dir, keep):
+    """Delete all but the newest `keep` snapshots; returns the removed paths."""
+    removed = list_snapshots(backup_dir)[keep:]
+    for path in removed:
+        os.remove(path)
+    return removed
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+def write_status(backup_dir, **status):
+    """Replace the status file atomically (readers in other processes never see half of it)."""
+    os.makedirs(backup_dir, exist_ok=True)
+    path = os.path.join(backup_dir, STATUS_FILE)
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump({**status, 'pid': os.getpid(), 'updated_at': _now()}, f)
+    os.replace(f'{path}.tmp', path)
+
+def read_status(backup_dir=None):
+    """The last snapshot's state: running, done (with its details) or failed (with the error)."""
+    backup_dir = backup_dir or default_backup_dir()
+    try:
+        with open(os.path.join(backup_dir, STATUS_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'state': 'idle'}
+
+def create_snapshot(backup_dir=None, keep=None):
+    """
+    Copy nakama.db page-step by page-step into backup_dir, verify the copy, then
+    rotate old snapshots. The copy is a consistent point-in-time image: if another
+    connection writes mid-copy, SQLite restarts the copy from that write. After
+    BACKUP_MAX_RESTARTS restarts the rest is copied in one step, which in WAL mode
+    only holds a read snapshot, so steady writes can't keep a backup from finishing.
+    """
+    backup_dir, keep = backup_dir or default_backup_dir(), keep or config.BACKUP_KEEP
+    with backup_lock(backup_dir):
+        return _snapshot_with_status(backup_dir, keep)
+
+def start_snapshot(backup_dir=None, keep=None):
+    """
+    Start create_snapshot in a background thread and return at once. The backup
+    lock is taken here, so a snapshot already running (in any process) raises
+    BackupError now instead of failing in the thread.
+    """
+    backup_dir, keep = backup_dir or default_backup_dir(), keep or config.BACKUP_KEEP
+    with ExitStack() as stack:
+        stack.enter_context(backup_lock(backup_dir))
+        write_status(backup_dir, state='running', started_at=_now())
+        held = stack.pop_all()  # from here on the thread releases the lock
+
+    def run():
+        with held:
+            try:
+                _snapshot_with_status(backup_dir, keep)
+            except (BackupError, sqlite3.Error, OSError) as e:
+                print(f"Backup failed: {e}", file=sys.stderr, flush=True)
+
+    threading.Thread(target=run, name='db-backup', daemon=True).start()
+
+def _snapshot_with_status(backup_dir, keep):
+    started_at = _now()
+    write_status(backup_dir, state='running', started_at=started_at)
+    try:
+        info = _snapshot(backup_dir, keep)
+    except (BackupError, sqlite3.Error, OSError) as e:
+        write_status(backup_dir, state='failed', started_at=started_at, error=str(e))
+        raise
+    write_status(backup_dir, state='done', started_at=started_at,
+                 **{**info, 'path': os.path.basename(info['path'])})
+    return info
+
+def _snapshot(backup_dir, keep):
+    """One snapshot; the caller holds backup_lock."""
+    for name in os.listdir(backup_dir):
+        if name.endswith('.partial'):  # left behind by an interrupted run
+            os.remove(os.path.join(backup_dir, name))
+    # microseconds: two snapshots in the same second must not share a name
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S-%f')
+    path = os.path.join(backup_dir, f'{PREFIX}{stamp}{SUFFIX}')
+    partial = f'{path}.partial'
+
+    start = time.perf_counter()
+    progress = _StepProgress()
+    src = sqlite3.connect(db_path())
+    dst = sqlite3.connect(partial)
+    try:
+        try:
+            src.backup(dst, pages=config.BACKUP_PAGES_PER_STEP, progress=progress)
+        except _TooManyRestarts:
+            src.backup(dst, pages=-1)
+    finally:
+        dst.close()
+        src.close()
+    try:
+        cards = verify_snapshot(partial)
+    except (BackupError, sqlite3.Error):
+        os.remove(partial)
+        raise
+    os.replace(partial, path)  # only verified snapshots get the final name
+
+    return {
+        'path': path,
+        'size': os.path.getsize(path),
+        'cards': cards,
+        'seconds': round(time.perf_counter() - start, 3),
+        'restarts': progress.restarts,
+        'rotated': [os.path.basename(p) for p in rotate(backup_dir, keep)],
+    }
+
+def run_forever(interval_hours=None):
+    interval_hours = interval_hours or config.BACKUP_INTERVAL_HOURS
+    while True:
+        try:
+            info = create_snapshot()
+            print(f"Backup {info['path']}: {info['size']} bytes, {info['cards']} cards, {info['seconds']}s", flush=True)
+        except (BackupError, sqlite3.Error, OSError) as e:
+            print(f"Backup failed: {e}", file=sys.stderr, flush=True)
+        time.sleep(interval_hours * 3600)
+
+def main():
+    parser = argparse.ArgumentParser(description='Online backups of nakama.db')
+    parser.add_argument('--loop', action='store_true', help='snapshot every BACKUP_INTERVAL_HOURS')
+    parser.add_argument('--verify', metavar='SNAPSHOT', help='only check an existing snapshot')
+    args = parser.parse_args()
+    if args.verify:
+        print(f"{args.verify}: ok, {verify_snapshot(args.verify)} cards")
+    elif args.loop:
+        run_forever()
+    else:
+        info = create_snapshot()
+        print(f"Backup {info['path']}: {info['size']} bytes, {info['cards']} cards, {info['seconds']}s")
+
+if __name__ == '__main__':
+    main()
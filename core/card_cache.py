@@ -0,0 +1,142 @@
+import os
+import string
+import threading
+from collections import OrderedDict
+from core.database import CARD_URL_KEY, card_changes, data_version, query_db
+from core.metrics import CARD_CACHE_ENTRIES, CARD_CACHE_EVICTIONS, CARD_CACHE_REQUESTS
+
+CARD_CACHE_MAX_ROWS = int(os.getenv('CARD_CACHE_MAX_ROWS', '5000'))  # cached card rows per worker
+
+# SQLite's NOCASE only folds ASCII letters; str.lower() would also merge non-ASCII
+# names that the owner query tells apart, and split entries it treats as one
+_NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def owner_key(owner):
+    """owner folded the way `owner = ? COLLATE NOCASE` compares it."""
+    return owner.translate(_NOCASE)
+
+def _row_url_key(row):
+    """CARD_URL_KEY of a cards row, computed the way SQLite does."""
+    url = row['card_url'] or ''
+    return url[url.find('/card/') + 6:]
+
+class CardCache:
+    """
+    Read-through LRU cache of card rows, by card_id and by owner.
+    Every commit to nakama.db (from any worker or BACKEND script) bumps
+    PRAGMA data_version; the next read then drops only the cards and owners
+    that the card_changes log lists since the last read. Commits that touch no
+    card (claims queued at login, password rehashes) keep every entry.
+    """
+
+    def __init__(self, max_rows=CARD_CACHE_MAX_ROWS):
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # ('card', card_id) | ('owner', owner_key(owner)) -> (rows, size)
+        self._url_ids = OrderedDict()  # CARD_URL_KEY value -> card_id, checked against the cached row
+        self._rows = 0
+        self._version = None
+        self._seq = None  # last card_changes row applied
+        self._generation = 0  # bumped on every invalidation; loads started before it aren't stored
+
+    def card(self, card_id):
+        """The cards row for card_id, or None."""
+        rows = self._get(('card', card_id), 'card',
+                         lambda: query_db('SELECT * FROM cards WHERE card_id = ?', [card_id]))
+        return rows[0] if rows else None
+
+    def card_by_url_key(self, key):
+        """The cards row whose CARD_URL_KEY is key (the /card/<key> page), or None."""
+        with self._lock:
+            card_id = self._url_ids.get(key)
+        if card_id is not None:
+            row = self.card(card_id)
+            # the card's URL may have changed since the key was remembered
+            if row is not None and _row_url_key(row) == key:
+                return row
+        row = query_db(f"SELECT * FROM cards WHERE {CARD_URL_KEY} = ? LIMIT 1", [key], one=True)
+        if row is not None:
+            with self._lock:
+                self._url_ids[key] = row['card_id']
+                self._url_ids.move_to_end(key)
+                while len(self._url_ids) > self.max_rows:
+                    self._url_ids.popitem(last=False)
+        return row
+
+    def owner_cards(self, owner):
+        """All cards rows of owner (case-insensitive, like the owner column lookups)."""
+        return self._get(('owner', owner_key(owner)), 'owner',
+                         lambda: query_db('SELECT * FROM cards WHERE owner = ? COLLATE NOCASE', [owner]))
+
+    def invalidate(self, card_ids=(), owners=()):
+        """Drop the given cards and owners' card lists after writing them."""
+        with self._lock:
+            self._generation += 1
+            self._drop_changed([(card_id, None) for card_id in card_ids] + [(None, owner) for owner in owners])
+
+    def clear(self):
+        """Drop everything, e.g. after running a pipeline stage."""
+        with self._lock:
+            self._generation += 1
+            self._clear()
+
+    def _sync(self):
+        """Apply commits made since the last read; hold _lock."""
+        version = data_version()
+        if version == self._version:
+            return
+        self._version = version
+        self._seq, changed = card_changes(self._seq)
+        if changed is None:
+            self._clear()
+        elif not changed:
+            return
+        else:
+            self._drop_changed(changed)
+        self._generation += 1
+
+    def _get(self, key, kind, load):
+        with self._lock:
+            self._sync()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                CARD_CACHE_REQUESTS.labels(kind, 'hit').inc()
+                return entry[0]
+            generation = self._generation
+        CARD_CACHE_REQUESTS.labels(kind, 'miss').inc()
+
+        rows = load()
+        with self._lock:
+            # Skip storing if cards changed while loading; the next read reloads
+            if generation == self._generation and key not in self._entries:
+                size = max(len(rows), 1)
+                if size <= self.max_rows:
+                    self._entries[key] = (rows, size)
+                    self._rows += size
+                    while self._rows > self.max_rows:
+                        self._drop(next(iter(self._entries)))
+                        CARD_CACHE_EVICTIONS.inc()
+                    CARD_CACHE_ENTRIES.set(self._rows)
+        return rows
+
+    def _drop_changed(self, changed):
+        for card_id, owner in changed:
+            if card_id:
+                self._drop(('card', card_id))
+            if owner:
+                self._drop(('owner', owner_key(owner)))
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._rows -= entry[1]
+            CARD_CACHE_ENTRIES.set(self._rows)
+
+    def _clear(self):
+        self._entries.clear()
+        self._url_ids.clear()
+        self._rows = 0
+        CARD_CACHE_ENTRIES.set(0)
+
+card_cache = CardCache()
@@ -0,0 +1,86 @@
+import os
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# --- Settings (override in .env) ---
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))  # bytes; smaller bodies go out as-is
+COMPRESS_STREAM_MIN_SIZE = int(os.getenv('COMPRESS_STREAM_MIN_SIZE', '262144'))  # bytes; larger bodies are compressed as a stream
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '6'))           # gzip level 1-9
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))           # brotli quality 0-11
+COMPRESS_CHUNK_SIZE = 64 * 1024  # bytes handed to the compressor per call when streaming
+COMPRESS_MIMETYPES = {'application/json', 'text/html', 'text/plain'}
+
+def choose_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def compress_body(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+
+def compress_stream(chunks, encoding):
+    """Compress a streamed body chunk by chunk, never holding the whole payload."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)  # wbits=31: gzip container
+        compress, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        # A buffered body arrives as one chunk: feed it in slices, so the compressed
+        # output goes out as it is produced instead of piling up next to the original
+        view = memoryview(chunk)
+        for start in range(0, len(view), COMPRESS_CHUNK_SIZE):
+            out = compress(view[start:start + COMPRESS_CHUNK_SIZE])
+            if out:
+                yield out
+    yield finish()
+
+def _after_request(response):
+    if (
+        response.status_code < 200 or response.status_code in (204, 304)
+        or request.method == 'HEAD'
+        or response.direct_passthrough             # send_file / send_from_directory
+        or 'Content-Encoding' in response.headers  # already precompressed
+        or response.mimetype not in COMPRESS_MIMETYPES
+    ):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    size = None if response.is_streamed else response.calculate_content_length()
+    if size is not None and size < COMPRESS_MIN_SIZE:
+        return response
+    if size is None or size >= COMPRESS_STREAM_MIN_SIZE:
+        # Large or streamed bodies: compress chunk by chunk as they are sent, so
+        # the compressed copy never sits in memory next to the original
+        response.response = compress_stream(response.iter_encoded(), encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        # Small bodies in one go, keeping a Content-Length
+        response.set_data(compress_body(response.get_data(), encoding))
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak)
+    return response
+
+def init_compression(app):
+    """Compress JSON/HTML/text responses on the fly based on Accept-Encoding."""
+    app.after_request(_after_request)
@@ -0,0 +1,129 @@
+"""
+Settings for the pipeline scripts and core.database, read from the repo's .env once and checked when used.
+
+    from core.config import config
+    count = config.NUMBER_OF_CARDS      # int; ConfigError if it's set but not a number
+    csv_path = config.SYSTEM_FULL_DB_CSV  # ConfigError if it isn't set
+
+Importing this module costs nothing: .env is parsed on the first setting read,
+and only the settings a stage actually reads are validated. Real environment
+variables win over .env, as with load_dotenv().
+"""
+import os
+import threading
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+ENV_FILE = os.path.join(ROOT, '.env')
+
+class ConfigError(RuntimeError):
+    """A setting a stage needs is missing or malformed."""
+
+def _int(name, raw):
+    try:
+        return int(raw)
+    except ValueError:
+        raise ConfigError(f"{name} must be an integer, got {raw!r}") from None
+
+def _float(name, raw):
+    try:
+        return float(raw)
+    except ValueError:
+        raise ConfigError(f"{name} must be a number, got {raw!r}") from None
+
+def _choice(name, raw, choices):
+    value = raw.lower()
+    if value not in choices:
+        raise ConfigError(f"{name} must be one of {', '.join(sorted(choices))}, got {raw!r}")
+    return value
+
+class Setting:
+    """One .env key: parsed with `parse` on first read, `default` when unset (None means required)."""
+
+    def __init__(self, parse=str, default=None, doc=''):
+        self.parse = parse
+        self.default = default
+        self.__doc__ = doc
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, config, owner=None):
+        if config is None:
+            return self
+        return config.get(self.name)
+
+class Config:
+    """Typed access to the settings below; values are parsed and cached on first read."""
+
+    NUMBER_OF_CARDS = Setting(lambda raw: _int('NUMBER_OF_CARDS', raw), 5, 'cards created per pipeline run')
+    SYSTEM_FULL_DB_CSV = Setting(doc='legacy full card export (CSV)')
+    COINS_DB_JSON = Setting(default='core/data/coins_db.json', doc='top coins fetched by AA')
+    CARDS_BANK_FOLDER = Setting(doc='card images')
+    CARDS_THUMBS_FOLDER = Setting(default='', doc='thumbnails; defaults to CARDS_BANK_FOLDER/thumbs')
+    QR_CODES_FOLDER = Setting(doc='generated QR codes')
+    GOOGLE_CALLBACK_URL = Setting(default='https://nakama.weforks.org', doc='public URL; card links use its host')
+
+    # core.database reads these on use, so a value set only in .env applies to every script
+    NAKAMA_DB_PATH = Setting(default=os.path.join(ROOT, 'core', 'data', 'nakama.db'),
+                             doc='the SQLite DB; load tests and benchmarks point it elsewhere')
+    DB_JOURNAL_MODE = Setting(lambda raw: _choice('DB_JOURNAL_MODE', raw, {'wal', 'delete', 'truncate'}), 'wal', 'wal: readers and the writer never block each other; delete: rollback journal')
+    DB_BUSY_TIMEOUT = Setting(lambda raw: _float('DB_BUSY_TIMEOUT', raw), 5.0, 'seconds SQLite itself waits on a lock')
+    DB_WRITE_RETRIES = Setting(lambda raw: _int('DB_WRITE_RETRIES', raw), 5, 'further write attempts after that, with backoff')
+    DB_WRITE_BACKOFF_MS = Setting(lambda raw: _float('DB_WRITE_BACKOFF_MS', raw), 50.0, 'first backoff; doubles, jittered')
+    DB_WRITE_QUEUE = Setting(lambda raw: raw == '1', False, '1: one writer thread per process for run_write()')
+    BACKUP_DIR = Setting(default='', doc='snapshots; defaults to a backups folder next to the DB')
+    BACKUP_KEEP = Setting(lambda raw: _int('BACKUP_KEEP', raw), 14, 'snapshots kept by rotation')
+    BACKUP_INTERVAL_HOURS = Setting(lambda raw: _float('BACKUP_INTERVAL_HOURS', raw), 6.0, 'db_backup pause between snapshots')
+    BACKUP_PAGES_PER_STEP = Setting(lambda raw: _int('BACKUP_PAGES_PER_STEP', raw), 256, 'pages copied per lock hold')
+    BACKUP_STEP_PAUSE_MS = Setting(lambda raw: _float('BACKUP_STEP_PAUSE_MS', raw), 5.0, 'gap between steps for writers')
+    BACKUP_MAX_RESTARTS = Setting(lambda raw: _int('BACKUP_MAX_RESTARTS', raw), 3,
+                                  'paged copy restarts (writes) before copying in one step')
+    CLAIM_BATCH_SIZE = Setting(lambda raw: _int('CLAIM_BATCH_SIZE', raw), 500, 'claims applied per transaction')
+    CLAIM_POLL_SECONDS = Setting(lambda raw: _float('CLAIM_POLL_SECONDS', raw), 2.0, 'claims worker pause between queue checks')
+
+    def __init__(self, env_file=ENV_FILE):
+        self.env_file = env_file
+        self._values = {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _read_env_file(self):
+        # python-dotenv is only imported here, the first time a setting is read
+        if self._file is None:
+            with self._lock:
+                if self._file is None:
+                    from dotenv import dotenv_values
+                    values = dotenv_values(self.env_file) if os.path.exists(self.env_file) else {}
+                    self._file = {k: v for k, v in values.items() if v is not None}
+        return self._file
+
+    def raw(self, name, default=None):
+        """The unparsed value: environment first, then .env, then default."""
+        if name in os.environ:
+            return os.environ[name]
+        return self._read_env_file().get(name, default)
+
+    def get(self, name):
+        if name not in self._values:
+            setting = getattr(type(self), name)
+            raw = self.raw(name)
+            if raw is None or raw == '':
+                if setting.default is None:
+                    raise ConfigError(f"{name} is not set (environment or {self.env_file})")
+                value = setting.default
+            else:
+                value = setting.parse(raw)
+            self._values[name] = value
+        return self._values[name]
+
+    @property
+    def thumbs_folder(self):
+        return self.CARDS_THUMBS_FOLDER or os.path.join(self.CARDS_BANK_FOLDER, 'thumbs')
+
+    def clear(self):
+        """Forget parsed values and .env (tests, or after editing .env in a long-lived process)."""
+        with self._lock:
+            self._values.clear()
+            self._file = None
+
+config = Config()
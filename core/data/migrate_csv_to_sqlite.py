@@ -7,7 +7,7 @@ import sys
 # Since this script is in core/data/, we can go up two levels.
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from core.database import DB_PATH, init_db
+from core.database import db_path, init_db
 
 SYSTEM_CSV = os.path.join(os.path.dirname(__file__), "system_full_db.csv")
 USER_DB_CSV = os.path.join(os.path.dirname(__file__), "user_db.csv")
@@ -47,8 +47,9 @@ def migrate_users(conn):
                 
                 try:
                     c.execute('''
-                        INSERT OR REPLACE INTO users (username, password, role)
+                        INSERT INTO users (username, password, role)
                         VALUES (?, ?, ?)
+                        ON CONFLICT(username) DO UPDATE SET password = excluded.password, role = excluded.role
                     ''', (username, password, role))
                     count += 1
                 except sqlite3.Error as e:
@@ -86,13 +87,23 @@ def migrate_cards(conn):
             # or we can check file existence. For now let's leave image_filename NULL 
             # and rely on ID-based lookup or update logic later.
             
+            # An upsert, not INSERT OR REPLACE: REPLACE deletes the old row without firing
+            # the DELETE triggers (recursive_triggers is off), leaving stale cards_fts text
             try:
                 c.execute('''
-                    INSERT OR REPLACE INTO cards (
+                    INSERT INTO cards (
                         card_id, pack_id, card_date, user_type, owner, description, 
                         coins, usd_amount, name, chain, theme, card_type, 
                         card_url, card_keys, status, monster_power, power_combat
                     ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(card_id) DO UPDATE SET
+                        pack_id = excluded.pack_id, card_date = excluded.card_date,
+                        user_type = excluded.user_type, owner = excluded.owner,
+                        description = excluded.description, coins = excluded.coins,
+                        usd_amount = excluded.usd_amount, name = excluded.name, chain = excluded.chain,
+                        theme = excluded.theme, card_type = excluded.card_type, card_url = excluded.card_url,
+                        card_keys = excluded.card_keys, status = excluded.status,
+                        monster_power = excluded.monster_power, power_combat = excluded.power_combat
                 ''', (
                     card_id,
                     row.get('PACK_ID', ''),
@@ -124,7 +135,7 @@ def main():
     init_db()
     
     # Connect
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(db_path())
     
     migrate_users(conn)
     migrate_cards(conn)
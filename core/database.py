@@ -1,35 +1,220 @@
 import sqlite3
 import os
-from flask import g, has_app_context
+import sys
+import time
+import queue
+import random
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from core.config import config
 
-DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'nakama.db')
+# Set by tools that run this process against another DB (load tests, benchmarks);
+# otherwise config.NAKAMA_DB_PATH (environment or .env, then core/data/nakama.db)
+DB_PATH = None
 _standalone_db = None
+_version_db = None  # (pid, connection) used only for PRAGMA data_version
+_version_lock = threading.Lock()
+
+# The <key> of a card_url ending in /card/<key>, as idx_cards_url_key indexes it.
+# Queries must spell the expression exactly like this for SQLite to use the index.
+CARD_URL_KEY = "substr(card_url, instr(card_url, '/card/') + 6)"
+
+CARD_CHANGES_KEEP = 10000  # card_changes rows kept for the card cache to catch up from
+
+_writer = None  # (pid, queue) of the single-writer thread
+_writer_lock = threading.Lock()
+_open_writes = set()  # id() of connections inside a write_transaction block
+
+def db_path():
+    """The database file this process uses."""
+    return DB_PATH or config.NAKAMA_DB_PATH
+
+def _connect(**kwargs):
+    # DB_BUSY_TIMEOUT and friends are read through config on use, so a value set only in .env applies
+    return sqlite3.connect(db_path(), timeout=config.DB_BUSY_TIMEOUT, **kwargs)
+
+def _app_globals():
+    """flask.g inside an app context, else None. Flask is never imported here: the
+    pipeline scripts don't load it, and without it there can't be an app context."""
+    flask = sys.modules.get('flask')
+    if flask is None or not flask.has_app_context():
+        return None
+    return flask.g
 
 def get_db():
     global _standalone_db
-    if has_app_context():
+    g = _app_globals()
+    if g is not None:
         db = getattr(g, '_database', None)
         if db is None:
-            db = g._database = sqlite3.connect(DB_PATH)
+            # Only requests can be profiled, so the profiler is imported here, not at module level
+            from core.sql_profiler import SQL_PROFILE, ProfilingConnection, attach
+            if SQL_PROFILE:
+                db = g._database = _connect(factory=ProfilingConnection)
+                attach(db)
+            else:
+                db = g._database = _connect()
             db.row_factory = sqlite3.Row
         return db
     else:
         if _standalone_db is None:
-            _standalone_db = sqlite3.connect(DB_PATH)
+            _standalone_db = _connect()
             _standalone_db.row_factory = sqlite3.Row
         return _standalone_db
 
 def close_db(e=None):
-    if has_app_context():
+    g = _app_globals()
+    if g is not None:
         db = getattr(g, '_database', None)
         if db is not None:
             db.close()
     else:
         pass # Standalone db is kept open or closed manually if needed
 
+def _version_conn():
+    """The dedicated per-process connection for data_version/card_changes; hold _version_lock."""
+    global _version_db
+    if _version_db is None or _version_db[0] != os.getpid():
+        _version_db = (os.getpid(), sqlite3.connect(db_path(), check_same_thread=False))
+    return _version_db[1]
+
+def data_version():
+    """
+    Number that changes whenever any connection commits to nakama.db.
+    Read on a dedicated per-process connection, so commits made by request
+    connections, other workers and BACKEND scripts all count.
+    """
+    with _version_lock:
+        return _version_conn().execute('PRAGMA data_version').fetchone()[0]
+
+def card_changes(since, limit=1000):
+    """
+    (last seq, [(card_id, owner), ...]) for cards changed after seq `since`.
+    The list is None when `since` is None, has been trimmed away, or more than
+    `limit` cards changed: the caller should then forget everything.
+    """
+    with _version_lock:
+        conn = _version_conn()
+        if since is None:
+            return conn.execute('SELECT COALESCE(MAX(seq), 0) FROM card_changes').fetchone()[0], None
+        rows = conn.execute(
+            'SELECT seq, card_id, owner FROM card_changes WHERE seq > ? ORDER BY seq LIMIT ?', (since, limit + 1)
+        ).fetchall()
+    if not rows:
+        return since, []
+    # seq has no gaps (AUTOINCREMENT, serialized writers), so a jump means trimmed rows
+    if rows[0][0] != since + 1 or len(rows) > limit:
+        return card_changes(None)[0], None
+    return rows[-1][0], [(card_id, owner) for _, card_id, owner in rows]
+
+def is_busy(error):
+    """True for SQLITE_BUSY / SQLITE_LOCKED ("database is locked"), which are worth retrying."""
+    return isinstance(error, sqlite3.OperationalError) and 'locked' in str(error)
+
+def _retry_busy(step, name):
+    """Run step() until it stops failing with a busy error, sleeping with jittered exponential backoff."""
+    # prometheus_client is slow to import; pipeline stages import this module but may never write
+    from core.metrics import WRITE_FAILURES, WRITE_RETRIES
+    retries, backoff_ms = config.DB_WRITE_RETRIES, config.DB_WRITE_BACKOFF_MS
+    for attempt in range(retries + 1):
+        try:
+            return step()
+        except sqlite3.OperationalError as e:
+            if not is_busy(e) or attempt == retries:
+                WRITE_FAILURES.labels(name).inc()
+                raise
+            WRITE_RETRIES.labels(name).inc()
+            # full jitter, so writers that collided don't retry in lockstep
+            time.sleep(random.uniform(0, backoff_ms * 2 ** attempt) / 1000)
+
+@contextmanager
+def write_transaction(db=None, name='write'):
+    """
+    Run the block as one BEGIN IMMEDIATE transaction. The write lock is taken up
+    front (no read-to-write upgrade that fails with "database is locked"), and
+    BEGIN and COMMIT are retried on busy errors. A nested write_transaction on
+    the same db joins the outer one, which commits.
+    """
+    db = db or get_db()
+    if id(db) in _open_writes:
+        yield db
+        return
+    if db.in_transaction:
+        # An implicit transaction (a write made outside write_transaction) would be
+        # committed or rolled back with this block without its owner knowing
+        raise sqlite3.ProgrammingError(
+            f"{name}: connection has an uncommitted transaction; commit or roll it back first"
+        )
+    from core.metrics import WRITE_LOCK_WAIT
+    start = time.perf_counter()
+    _retry_busy(lambda: db.execute('BEGIN IMMEDIATE'), name)
+    WRITE_LOCK_WAIT.labels(name).observe(time.perf_counter() - start)
+    _open_writes.add(id(db))
+    try:
+        yield db
+        _retry_busy(db.commit, name)
+    except BaseException:
+        db.rollback()
+        raise
+    finally:
+        _open_writes.discard(id(db))
+
+def _writer_loop(jobs):
+    conn = _connect()
+    conn.row_factory = sqlite3.Row
+    while True:
+        fn, name, future = jobs.get()
+        if not future.set_running_or_notify_cancel():
+            continue
+        try:
+            with write_transaction(conn, name):
+                result = fn(conn)
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+
+def _writer_queue():
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer[0] != os.getpid():
+            jobs = queue.Queue()
+            threading.Thread(target=_writer_loop, args=(jobs,), name='db-writer', daemon=True).start()
+            _writer = (os.getpid(), jobs)
+        return _writer[1]
+
+def run_write(fn, name='write'):
+    """
+    Run fn(db) in a write transaction and return its result. With DB_WRITE_QUEUE=1
+    every call in this process goes through one writer thread, so hot paths queue
+    behind each other instead of contending for the lock.
+    """
+    if not config.DB_WRITE_QUEUE:
+        with write_transaction(name=name) as db:
+            return fn(db)
+    future = Future()
+    _writer_queue().put((fn, name, future))
+    return future.result()
+
 def init_db():
-    """Initialize the database with the schema."""
-    conn = sqlite3.connect(DB_PATH)
+    """
+    Initialize the database with the schema. Runs as one BEGIN IMMEDIATE
+    transaction: processes starting together (gunicorn workers, BACKEND scripts)
+    queue on the write lock, and the one-off backfills below check their markers
+    under it, so each runs exactly once.
+
+    Also sets DB_JOURNAL_MODE, which is stored in the file: in WAL mode polling
+    readers no longer hold up a writer's commit, and a commit never blocks them.
+    """
+    conn = _connect()
+    try:
+        _retry_busy(lambda: conn.execute(f'PRAGMA journal_mode = {config.DB_JOURNAL_MODE}'), 'init_db')
+        with write_transaction(conn, 'init_db'):
+            _create_schema(conn)
+    finally:
+        conn.close()
+
+def _create_schema(conn):
     c = conn.cursor()
     
     # Users table
@@ -63,17 +248,239 @@ def init_db():
             status TEXT,
             monster_power TEXT,
             power_combat TEXT,
-            image_filename TEXT
+            image_filename TEXT,
+            image_hash TEXT
         )
     ''')
+
+    # Columns added after the initial schema
+    card_columns = {row[1] for row in c.execute('PRAGMA table_info(cards)')}
+    if 'image_hash' not in card_columns:
+        c.execute('ALTER TABLE cards ADD COLUMN image_hash TEXT')
     
-    conn.commit()
-    conn.close()
+    # Resized card image variants, written by AV_create_thumbnails
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS card_thumbnails (
+            card_id TEXT NOT NULL,
+            width INTEGER NOT NULL,
+            format TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            source_mtime REAL NOT NULL,
+            PRIMARY KEY (card_id, width, format)
+        ) WITHOUT ROWID
+    ''')
+
+    # Store catalog: materialized listing of SYSTEM-owned, unclaimed packs.
+    # Rebuilt by C_send_packs_to_store; claimed packs are dropped by trigger.
+    c.execute('CREATE INDEX IF NOT EXISTS idx_cards_pack_id ON cards (pack_id)')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS store_packs (
+            pack_id TEXT PRIMARY KEY,
+            chain TEXT,
+            theme TEXT,
+            card_types TEXT,
+            card_count INTEGER NOT NULL,
+            card_date TEXT
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS store_pack_types (
+            card_type TEXT NOT NULL,
+            pack_id TEXT NOT NULL,
+            PRIMARY KEY (card_type, pack_id)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_store_packs_chain ON store_packs (chain, pack_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_store_packs_theme ON store_packs (theme, pack_id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_store_pack_types_pack ON store_pack_types (pack_id)')
+
+    # Single-row version counter, bumped on every listing change so cached
+    # store pages can be validated with one primary-key lookup.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS store_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    ''')
+    c.execute('INSERT OR IGNORE INTO store_state (id, version) VALUES (1, 0)')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS store_packs_insert AFTER INSERT ON store_packs
+        BEGIN
+            UPDATE store_state SET version = version + 1 WHERE id = 1;
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS store_packs_delete AFTER DELETE ON store_packs
+        BEGIN
+            DELETE FROM store_pack_types WHERE pack_id = OLD.pack_id;
+            UPDATE store_state SET version = version + 1 WHERE id = 1;
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS cards_store_claim AFTER UPDATE OF owner, status ON cards
+        WHEN NOT (NEW.owner = 'SYSTEM' AND COALESCE(NEW.status, '') IN ('', 'STATUS_1'))
+        BEGIN
+            DELETE FROM store_packs WHERE pack_id = NEW.pack_id;
+        END
+    ''')
+
+    # cards.user_type mirrors the owner's role (SYSTEM when the owner isn't a
+    # user). Kept in step row by row by triggers instead of full-table passes.
+    user_type_synced = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'cards_user_type_owner'"
+    ).fetchone()
+    c.execute('CREATE INDEX IF NOT EXISTS idx_cards_owner ON cards (owner)')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS cards_user_type_insert AFTER INSERT ON cards
+        WHEN COALESCE(NEW.user_type, '') = ''
+        BEGIN
+            UPDATE cards SET user_type = COALESCE((SELECT role FROM users WHERE username = NEW.owner), 'SYSTEM')
+            WHERE rowid = NEW.rowid;
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS cards_user_type_owner AFTER UPDATE OF owner ON cards
+        WHEN NEW.owner IS NOT OLD.owner
+        BEGIN
+            UPDATE cards SET user_type = COALESCE((SELECT role FROM users WHERE username = NEW.owner), 'SYSTEM')
+            WHERE rowid = NEW.rowid;
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS users_user_type_insert AFTER INSERT ON users
+        BEGIN
+            UPDATE cards SET user_type = NEW.role WHERE owner = NEW.username;
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS users_user_type_update AFTER UPDATE OF username, role ON users
+        BEGIN
+            UPDATE cards SET user_type = 'SYSTEM' WHERE owner = OLD.username AND OLD.username IS NOT NEW.username;
+            UPDATE cards SET user_type = NEW.role WHERE owner = NEW.username;
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS users_user_type_delete AFTER DELETE ON users
+        BEGIN
+            UPDATE cards SET user_type = 'SYSTEM' WHERE owner = OLD.username;
+        END
+    ''')
+    if not user_type_synced:
+        # One full pass for rows written before the triggers existed
+        sync_user_types(conn)
+
+    # Which cards changed, for the per-worker card cache: it drops only the owners
+    # and cards listed here instead of everything on every commit. Trimmed to the
+    # last CARD_CHANGES_KEEP rows; a reader that falls further behind starts over.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS card_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            card_id TEXT,
+            owner TEXT
+        )
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS cards_changes_insert AFTER INSERT ON cards
+        BEGIN
+            INSERT INTO card_changes (card_id, owner) VALUES (NEW.card_id, NEW.owner);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS cards_changes_update AFTER UPDATE ON cards
+        BEGIN
+            INSERT INTO card_changes (card_id, owner) VALUES (NEW.card_id, NEW.owner);
+            INSERT INTO card_changes (card_id, owner) SELECT OLD.card_id, OLD.owner
+            WHERE OLD.card_id IS NOT NEW.card_id OR OLD.owner IS NOT NEW.owner;
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS cards_changes_delete AFTER DELETE ON cards
+        BEGIN
+            INSERT INTO card_changes (card_id, owner) VALUES (OLD.card_id, OLD.owner);
+        END
+    ''')
+    c.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS card_changes_trim AFTER INSERT ON card_changes
+        WHEN NEW.seq % 1000 = 0
+        BEGIN
+            DELETE FROM card_changes WHERE seq <= NEW.seq - {CARD_CHANGES_KEEP};
+        END
+    ''')
+
+    # Claims from /login waiting for D_change_card_owner. Rows are marked
+    # processed, never deleted, so the partial index only holds the backlog.
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS pending_claims (
+            id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL,
+            ref_url TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT (datetime('now')),
+            processed_at TEXT,
+            result TEXT
+        )
+    ''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_pending_claims_unprocessed ON pending_claims (id) WHERE processed_at IS NULL')
+    # Claims find their card by URL key with an exact match instead of LIKE '%<key>'
+    c.execute(f'CREATE INDEX IF NOT EXISTS idx_cards_url_key ON cards ({CARD_URL_KEY})')
+
+    # Full-text search over card text columns (external content, synced by triggers)
+    fts_exists = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cards_fts'"
+    ).fetchone()
+    c.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS cards_fts USING fts5(
+            name, description, theme, card_type, chain, coins,
+            content='cards', content_rowid='rowid'
+        )
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS cards_fts_insert AFTER INSERT ON cards
+        BEGIN
+            INSERT INTO cards_fts (rowid, name, description, theme, card_type, chain, coins)
+            VALUES (NEW.rowid, NEW.name, NEW.description, NEW.theme, NEW.card_type, NEW.chain, NEW.coins);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS cards_fts_delete AFTER DELETE ON cards
+        BEGIN
+            INSERT INTO cards_fts (cards_fts, rowid, name, description, theme, card_type, chain, coins)
+            VALUES ('delete', OLD.rowid, OLD.name, OLD.description, OLD.theme, OLD.card_type, OLD.chain, OLD.coins);
+        END
+    ''')
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS cards_fts_update
+        AFTER UPDATE OF name, description, theme, card_type, chain, coins ON cards
+        BEGIN
+            INSERT INTO cards_fts (cards_fts, rowid, name, description, theme, card_type, chain, coins)
+            VALUES ('delete', OLD.rowid, OLD.name, OLD.description, OLD.theme, OLD.card_type, OLD.chain, OLD.coins);
+            INSERT INTO cards_fts (rowid, name, description, theme, card_type, chain, coins)
+            VALUES (NEW.rowid, NEW.name, NEW.description, NEW.theme, NEW.card_type, NEW.chain, NEW.coins);
+        END
+    ''')
+    if not fts_exists:
+        # Index rows that existed before the FTS table was added
+        c.execute("INSERT INTO cards_fts (cards_fts) VALUES ('rebuild')")
+
+def sync_user_types(conn):
+    """Recompute user_type for every card (full pass; the triggers keep it current afterwards)."""
+    conn.execute('''
+        UPDATE cards
+        SET user_type = COALESCE((SELECT role FROM users WHERE users.username = cards.owner), 'SYSTEM')
+        WHERE user_type IS NOT COALESCE((SELECT role FROM users WHERE users.username = cards.owner), 'SYSTEM')
+    ''')
 
 def query_db(query, args=(), one=False):
-    cur = get_db().execute(query, args)
+    db = get_db()
+    start = time.perf_counter()
+    # Go through a cursor so the profiler times execute + fetch once, not execute twice
+    cur = db.cursor()
+    cur.execute(query, args)
     rv = cur.fetchall()
     cur.close()
+    # Profiling connections only come from get_db(), which loads the profiler first
+    profiler = sys.modules.get('core.sql_profiler')
+    if profiler is not None and isinstance(db, profiler.ProfilingConnection):
+        profiler.record_query(db, query, args, start)
     return (rv[0] if rv else None) if one else rv
 
 def update_card(card_id, field, value):
@@ -84,8 +491,21 @@ def update_card(card_id, field, value):
     # We cannot parametrize column names in sqlite3, so we must be careful.
     # However, these scripts are internal.
     query = f"UPDATE cards SET {field} = ? WHERE card_id = ?"
-    db.execute(query, (value, card_id))
-    db.commit()
+    with write_transaction(db, 'update_card'):
+        db.execute(query, (value, card_id))
+
+def card_url_key(ref_url):
+    """The card key of a full card URL, a /card/<key> suffix or a bare key (CARD_URL_KEY in Python)."""
+    ref = (ref_url or '').strip()
+    if '/card/' in ref:
+        ref = ref.split('/card/', 1)[1]
+    return ref.split('?', 1)[0].split('#', 1)[0]
+
+def enqueue_claim(username, ref_url):
+    """Queue a card claim for D_change_card_owner (one INSERT, safe with concurrent logins)."""
+    run_write(lambda db: db.execute(
+        'INSERT INTO pending_claims (username, ref_url) VALUES (?, ?)', (username, card_url_key(ref_url))
+    ), 'enqueue_claim')
 
 def get_all_card_ids():
     """Return list of all card IDs."""
@@ -0,0 +1,56 @@
+import sqlite3
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib encoder is always available
+    orjson = None
+
+# int/None dict keys are allowed by the stdlib encoder, so allow them here too
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+class Columnar:
+    """Rows to serialize as {"columns": [...], "rows": [[...], ...]} instead of a list of objects."""
+
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self, rows, columns=None):
+        self.rows = rows
+        self.columns = columns if columns is not None else (list(rows[0].keys()) if rows else [])
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes sqlite3.Row sequences as they are, with orjson when installed."""
+
+    sort_keys = False  # keep SELECT column order; sorting every record is wasted work
+
+    @staticmethod
+    def default(o):
+        # Each Row becomes a short-lived object while it's written out, so a
+        # 100k-row response never holds a second copy of the table as dicts.
+        if isinstance(o, sqlite3.Row):
+            return dict(zip(o.keys(), o))
+        if isinstance(o, Columnar):
+            return {'columns': o.columns, 'rows': [tuple(r) for r in o.rows]}
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        # orjson already produces UTF-8 bytes; skip the str round trip
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def init_json(app):
+    """Use FastJSONProvider for jsonify() and request.get_json()."""
+    app.json = FastJSONProvider(app)
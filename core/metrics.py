@@ -0,0 +1,126 @@
+import os
+import time
+from prometheus_client import (
+    REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+
+# Under gunicorn, PROMETHEUS_MULTIPROC_DIR is set (gunicorn.conf.py) and every
+# worker writes its samples to mmap'd files there; /metrics sums them.
+MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUEST_LATENCY = Histogram(
+    'nakama_request_duration_seconds', 'Request latency by endpoint',
+    ['endpoint', 'method'], buckets=LATENCY_BUCKETS
+)
+REQUEST_COUNT = Counter(
+    'nakama_requests_total', 'Requests by endpoint and status',
+    ['endpoint', 'method', 'status']
+)
+RESPONSE_SIZE = Histogram(
+    'nakama_response_size_bytes', 'Response body size by endpoint',
+    ['endpoint'], buckets=SIZE_BUCKETS
+)
+IN_FLIGHT = Gauge(
+    'nakama_requests_in_flight', 'Requests currently being handled',
+    ['endpoint'], multiprocess_mode='livesum'
+)
+SINGLE_FLIGHT = Counter(
+    'nakama_single_flight_total', 'Coalesced computations: computed, shared with an in-flight call, or cached',
+    ['key', 'outcome']
+)
+CARD_CACHE_REQUESTS = Counter(
+    'nakama_card_cache_requests_total', 'Card cache lookups by key kind (card, owner) and result (hit, miss)',
+    ['kind', 'result']
+)
+CARD_CACHE_EVICTIONS = Counter('nakama_card_cache_evictions_total', 'Card cache LRU evictions')
+CARD_CACHE_ENTRIES = Gauge(
+    'nakama_card_cache_rows', 'Card rows held in the card cache', multiprocess_mode='livesum'
+)
+WRITE_LOCK_WAIT = Histogram(
+    'nakama_db_write_lock_wait_seconds', 'Time to acquire the SQLite write lock (BEGIN IMMEDIATE)',
+    ['name'], buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+WRITE_RETRIES = Counter('nakama_db_write_retries_total', 'Write attempts retried after "database is locked"', ['name'])
+WRITE_FAILURES = Counter('nakama_db_write_failures_total', 'Writes that failed after all retries', ['name'])
+WORKERS_READY = Gauge(
+    'nakama_workers_ready', 'Workers that finished booting, by the code revision they loaded',
+    ['revision'], multiprocess_mode='livesum'
+)
+
+# Flask is imported inside the request hooks: BACKEND scripts import this module
+# (through core.database) for the write metrics only
+def _endpoint():
+    from flask import request
+    return request.endpoint or 'unmatched'
+
+def _before_request():
+    from flask import g
+    g._metrics_start = time.perf_counter()
+    IN_FLIGHT.labels(_endpoint()).inc()
+
+def _after_request(response):
+    from flask import g, request
+    start = g.get('_metrics_start')
+    if start is not None:
+        endpoint = _endpoint()
+        REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - start)
+        REQUEST_COUNT.labels(endpoint, request.method, str(response.status_code)).inc()
+        if response.content_length is not None:
+            RESPONSE_SIZE.labels(endpoint).observe(response.content_length)
+        elif not response.direct_passthrough:
+            # Streamed bodies (large compressed ones included) are measured as they are sent
+            response.response = _count_stream(response.iter_encoded(), endpoint)
+        g._metrics_counted = True
+    return response
+
+def _count_stream(chunks, endpoint):
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    finally:
+        # runs when the server closes the body, after the last chunk or on disconnect
+        RESPONSE_SIZE.labels(endpoint).observe(size)
+
+def _teardown_request(exc):
+    from flask import g, request
+    if g.pop('_metrics_start', None) is None:
+        return
+    endpoint = _endpoint()
+    IN_FLIGHT.labels(endpoint).dec()
+    # after_request is skipped when a view raises; count those as 500s
+    if not g.pop('_metrics_counted', False):
+        REQUEST_COUNT.labels(endpoint, request.method, '500').inc()
+
+def init_metrics(app):
+    """Register the request instrumentation hooks on the app."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+def _registry():
+    """The registry to read: every worker's samples under gunicorn, this process's otherwise."""
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def render_metrics():
+    """Return (body, content_type) in Prometheus text format, aggregated across workers."""
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+def ready_workers():
+    """{revision: live workers that booted it}, across all workers; rolling reloads wait on this."""
+    counts = {}
+    for metric in _registry().collect():
+        if metric.name == 'nakama_workers_ready':
+            for sample in metric.samples:
+                if sample.value:
+                    revision = sample.labels['revision']
+                    counts[revision] = counts.get(revision, 0) + int(sample.value)
+    return counts
@@ -0,0 +1,87 @@
+import os
+import hmac
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# --- Settings (override in .env) ---
+# werkzeug method string: scrypt:N:r:p or pbkdf2:sha256:iterations. Changing it
+# rehashes each user's password on their next successful login.
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+PASSWORD_WORKERS = int(os.getenv('PASSWORD_WORKERS', '1'))  # concurrent KDF computations per process
+PASSWORD_QUEUE = int(os.getenv('PASSWORD_QUEUE', '16'))     # logins allowed to wait for a worker
+
+KNOWN_METHODS = ('scrypt:', 'pbkdf2:')
+
+class PasswordBusy(Exception):
+    """Too many logins already waiting for the KDF pool."""
+
+_pool = None  # (pid, executor), created lazily so forked workers get their own
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(PASSWORD_WORKERS + PASSWORD_QUEUE)
+_dummy_hash = None  # future of hash_password(''), the pool's first job
+
+def _executor():
+    global _pool, _dummy_hash
+    with _pool_lock:
+        if _pool is None or _pool[0] != os.getpid():
+            _pool = (os.getpid(), ThreadPoolExecutor(PASSWORD_WORKERS, thread_name_prefix='kdf'))
+            # Queued first, so a _check waiting on it from a pool thread never waits for a free worker
+            _dummy_hash = _pool[1].submit(hash_password, '')
+        return _pool[1]
+
+def _run(fn, *args):
+    """
+    Run fn on the KDF pool. hashlib's scrypt/pbkdf2 release the GIL, so at most
+    PASSWORD_WORKERS cores go to hashing and the other request threads keep serving.
+    """
+    if not _slots.acquire(blocking=False):
+        raise PasswordBusy()
+    try:
+        return _executor().submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+def is_hashed(stored):
+    return stored.startswith(KNOWN_METHODS) and stored.count('$') == 2
+
+def hash_password(password):
+    """Hash with the configured KDF (runs inline; use for scripts and rehashing)."""
+    return generate_password_hash(password, method=PASSWORD_HASH_METHOD)
+
+def needs_rehash(stored):
+    """True for plaintext passwords and hashes made with other KDF parameters."""
+    return not is_hashed(stored) or stored.split('$', 1)[0] != current_method()
+
+def current_method():
+    """PASSWORD_HASH_METHOD as werkzeug writes it into hashes (defaults filled in)."""
+    return _get_dummy_hash().split('$', 1)[0]
+
+def _get_dummy_hash():
+    """A hash of '' with the configured KDF, computed on the pool rather than the request thread."""
+    _executor()
+    return _dummy_hash.result()
+
+def _check(stored, password):
+    if stored is None:
+        # Unknown user: spend the same KDF time so response timing doesn't reveal usernames
+        check_password_hash(_get_dummy_hash(), password)
+        return False
+    if is_hashed(stored):
+        return check_password_hash(stored, password)
+    # Legacy plaintext row, hashed by the caller after a successful login
+    return hmac.compare_digest(stored.encode('utf-8'), password.encode('utf-8'))
+
+def verify_password(stored, password):
+    """
+    Check password against a stored hash (or legacy plaintext; None for unknown users).
+    Returns (ok, new_hash); new_hash is set when the stored value should be replaced.
+    Raises PasswordBusy when the KDF pool's queue is full.
+    """
+    ok = _run(_check, stored, password)
+    if ok and needs_rehash(stored):
+        try:
+            return True, _run(hash_password, password)
+        except PasswordBusy:
+            pass  # log in now, rehash on a quieter login
+    return ok, None
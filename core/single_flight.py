@@ -0,0 +1,59 @@
+import os
+import time
+import threading
+from core.metrics import SINGLE_FLIGHT
+
+SINGLE_FLIGHT_TTL = float(os.getenv('SINGLE_FLIGHT_TTL', '5'))  # seconds a shared result is kept
+
+class _Call:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Run identical concurrent calls once and hand every caller the same result.
+    The result is kept for `ttl` seconds while the data version is unchanged,
+    so a burst of polls between two writes costs a single computation.
+    """
+
+    def __init__(self, ttl=SINGLE_FLIGHT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calls = {}    # (key, version) -> _Call in progress
+        self._results = {}  # key -> (version, expires, value)
+
+    def do(self, key, version, fn):
+        with self._lock:
+            cached = self._results.get(key)
+            if cached and cached[0] == version and cached[1] > time.monotonic():
+                SINGLE_FLIGHT.labels(key, 'cached').inc()
+                return cached[2]
+            call = self._calls.get((key, version))
+            leader = call is None
+            if leader:
+                call = self._calls[(key, version)] = _Call()
+
+        if not leader:
+            SINGLE_FLIGHT.labels(key, 'shared').inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        SINGLE_FLIGHT.labels(key, 'computed').inc()
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[(key, version)]
+                if call.error is None:
+                    self._results[key] = (version, time.monotonic() + self.ttl, call.value)
+            call.done.set()
+        return call.value
@@ -0,0 +1,112 @@
+import os
+import time
+import logging
+import sqlite3
+from collections import Counter
+
+# Opt-in: SQL_PROFILE=1 profiles every request's queries
+SQL_PROFILE = os.getenv('SQL_PROFILE') == '1'
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '100'))
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', '5'))  # same SQL, different args
+PROFILE_HEADER = 'X-SQL-Profile'
+
+logger = logging.getLogger('nakama.sql')
+
+class ProfilingConnection(sqlite3.Connection):
+    """sqlite3 connection that times execute()/executemany() calls made directly on it."""
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        cur = super().execute(sql, parameters)
+        record_query(self, sql, parameters, start)
+        return cur
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        cur = super().executemany(sql, seq_of_parameters)
+        record_query(self, sql, (), start)
+        return cur
+
+def _profile():
+    """Per-request profile state, or None outside requests or while explaining."""
+    # flask is imported lazily, like in core.database: BACKEND scripts never load it
+    from flask import g, has_request_context
+    if not has_request_context():
+        return None
+    prof = g.get('_sql_profile')
+    if prof is None:
+        prof = g._sql_profile = {'statements': 0, 'time': 0.0, 'queries': [], 'explaining': False}
+    return None if prof['explaining'] else prof
+
+def _trace(statement):
+    """set_trace_callback hook: counts every statement SQLite runs, trigger bodies included."""
+    prof = _profile()
+    if prof is not None:
+        prof['statements'] += 1
+
+def attach(db):
+    """Install the trace callback on a new request connection."""
+    db.set_trace_callback(_trace)
+
+def record_query(db, sql, args, start):
+    """Record one timed query; slow ones are logged with their query plan."""
+    prof = _profile()
+    if prof is None:
+        return
+    elapsed = time.perf_counter() - start
+    args = tuple(args) if not isinstance(args, dict) else tuple(sorted(args.items()))
+    prof['time'] += elapsed
+    prof['queries'].append((sql, args))
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        from flask import request
+        logger.warning('Slow query (%.1f ms) on %s: %s args=%r\n%s',
+                       elapsed * 1000, request.path, sql.strip(), args, explain(db, sql, args))
+
+def explain(db, sql, args):
+    """Return the EXPLAIN QUERY PLAN output for sql, without profiling the EXPLAIN itself."""
+    from flask import g
+    prof = g._sql_profile
+    prof['explaining'] = True
+    try:
+        rows = db.cursor().execute(f'EXPLAIN QUERY PLAN {sql}', args).fetchall()
+        return '\n'.join(f'  {row[3]}' for row in rows)
+    except sqlite3.Error as e:
+        return f'  (no plan: {e})'
+    finally:
+        prof['explaining'] = False
+
+def summarize(prof):
+    """Find identical statements run more than once and SQL shapes run N+1 style."""
+    repeated = [(q, n) for q, n in Counter(prof['queries']).items() if n > 1]
+    shapes = Counter(sql for sql, _ in prof['queries'])
+    n_plus_one = [(sql, n) for sql, n in shapes.items() if n >= N_PLUS_ONE_THRESHOLD]
+    return repeated, n_plus_one
+
+def _after_request(response):
+    from flask import g, request
+    prof = g.get('_sql_profile')
+    if not prof:
+        return response
+    repeated, n_plus_one = summarize(prof)
+    response.headers[PROFILE_HEADER] = (
+        f"queries={len(prof['queries'])}; statements={prof['statements']}; "
+        f"time_ms={prof['time'] * 1000:.2f}; repeated={len(repeated)}; n_plus_one={len(n_plus_one)}"
+    )
+    logger.info('%s %s: %d queries (%d statements) in %.2f ms',
+                request.method, request.path, len(prof['queries']), prof['statements'], prof['time'] * 1000)
+    for (sql, args), n in repeated:
+        logger.warning('Repeated query x%d on %s: %s args=%r', n, request.path, sql.strip(), args)
+    for sql, n in n_plus_one:
+        logger.warning('Possible N+1: %d executions on %s of: %s', n, request.path, sql.strip())
+    return response
+
+def init_sql_profiler(app):
+    """Enable per-request SQL profiling when SQL_PROFILE=1."""
+    if not SQL_PROFILE:
+        return
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s %(name)s: %(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    app.after_request(_after_request)
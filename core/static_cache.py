@@ -0,0 +1,79 @@
+import os
+import gzip
+import json
+import hashlib
+import mimetypes
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+LONG_MAX_AGE = 365 * 24 * 3600  # for URLs that carry the asset fingerprint (?v=...)
+
+# Profile page card templates by status, bundled into one response by /card_fragments
+FRAGMENTS = {
+    'STATUS_1': 'card_1.html',
+    'STATUS_2': 'card_2.html',
+    'STATUS_3': 'card_3.html',
+}
+BUNDLE_NAME = 'card_fragments.json'
+
+class Asset:
+    """An in-memory file with its gzip/brotli variants and a content fingerprint."""
+
+    def __init__(self, body, mimetype):
+        self.mimetype = mimetype
+        self.fingerprint = hashlib.sha256(body).hexdigest()[:12]
+        self.encodings = {'identity': body}
+        # Only keep a compressed variant when it actually saves bytes
+        gz = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(gz) < len(body):
+            self.encodings['gzip'] = gz
+        if brotli is not None:
+            br = brotli.compress(body, quality=11)
+            if len(br) < len(body):
+                self.encodings['br'] = br
+
+def load_static_cache(app):
+    """Read and precompress the card fragments once, at startup."""
+    # Where the fragment routes have always served them from, whatever TEMPLATE_FOLDER says
+    folder = os.path.join(app.root_path, 'core', 'FRONTEND')
+    assets = {}
+    for name in FRAGMENTS.values():
+        with open(os.path.join(folder, name), 'rb') as f:
+            assets[name] = Asset(f.read(), mimetypes.guess_type(name)[0] or 'application/octet-stream')
+
+    bundle = {status: assets[name].encodings['identity'].decode('utf-8') for status, name in FRAGMENTS.items()}
+    assets[BUNDLE_NAME] = Asset(json.dumps(bundle).encode('utf-8'), 'application/json')
+    app.extensions['static_cache'] = assets
+
+def asset_version(name):
+    """Fingerprint to put in the asset URL (?v=...) so it can be cached forever."""
+    return current_app.extensions['static_cache'][name].fingerprint
+
+def choose_encoding(asset):
+    accepted = request.accept_encodings
+    for encoding in ('br', 'gzip'):
+        if encoding in asset.encodings and accepted[encoding]:
+            return encoding
+    return 'identity'
+
+def send_cached_asset(name):
+    """Serve a precompressed asset, negotiated on Accept-Encoding, with a fingerprinted ETag."""
+    asset = current_app.extensions['static_cache'][name]
+    encoding = choose_encoding(asset)
+    response = current_app.response_class(asset.encodings[encoding], mimetype=asset.mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f'{asset.fingerprint}-{encoding}')
+    response.cache_control.public = True
+    if request.args.get('v') == asset.fingerprint:
+        response.cache_control.max_age = LONG_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        # Unversioned URL: cache, but revalidate against the ETag
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
@@ -0,0 +1,52 @@
+import json
+from core.database import get_db, write_transaction
+
+TRANSFER_STATUS = 'STATUS_2'  # owned, not yet activated (same as a claim)
+ACTIVE_STATUS = 'STATUS_3'    # activated cards stay active when they change hands
+
+class TransferError(ValueError):
+    """Transfer request that can't be applied (unknown user, nothing to move)."""
+
+def transfer_cards(username, card_ids=(), pack_ids=(), db=None):
+    """
+    Give username every card in card_ids and in the packs pack_ids, in one transaction.
+    owner changes with set-based SQL (user_type follows by trigger); cards not yet active
+    get TRANSFER_STATUS, active ones keep ACTIVE_STATUS. ids travel as
+    one JSON parameter each, so tens of thousands of cards cost a handful of statements.
+    Returns {'transferred': n, 'missing_cards': [...], 'missing_packs': [...]}.
+    """
+    card_ids, pack_ids = list(card_ids), list(pack_ids)
+    if not card_ids and not pack_ids:
+        raise TransferError('Nothing to transfer: give card_ids or pack_ids')
+    db = db or get_db()
+
+    with write_transaction(db, 'transfer_cards'):
+        # Checked under the write lock: the user can't be deleted before the cards move
+        if db.execute('SELECT 1 FROM users WHERE username = ?', (username,)).fetchone() is None:
+            raise TransferError(f'Unknown user: {username}')
+        db.execute('CREATE TEMP TABLE IF NOT EXISTS transfer_ids (card_id TEXT PRIMARY KEY) WITHOUT ROWID')
+        db.execute('DELETE FROM temp.transfer_ids')
+        db.execute('''
+            INSERT OR IGNORE INTO temp.transfer_ids
+            SELECT card_id FROM cards WHERE card_id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(card_ids),))
+        db.execute('''
+            INSERT OR IGNORE INTO temp.transfer_ids
+            SELECT card_id FROM cards WHERE pack_id IN (SELECT value FROM json_each(?))
+        ''', (json.dumps(pack_ids),))
+
+        missing_cards = [r[0] for r in db.execute('''
+            SELECT value FROM json_each(?) WHERE value NOT IN (SELECT card_id FROM cards)
+        ''', (json.dumps(card_ids),))]
+        missing_packs = [r[0] for r in db.execute('''
+            SELECT value FROM json_each(?) WHERE value NOT IN (SELECT pack_id FROM cards WHERE pack_id IS NOT NULL)
+        ''', (json.dumps(pack_ids),))]
+
+        # user_type follows owner through the cards_user_type_owner trigger
+        transferred = db.execute('''
+            UPDATE cards SET owner = ?, status = CASE WHEN status = ? THEN status ELSE ? END
+            WHERE card_id IN (SELECT card_id FROM temp.transfer_ids)
+        ''', (username, ACTIVE_STATUS, TRANSFER_STATUS)).rowcount
+        db.execute('DELETE FROM temp.transfer_ids')
+
+    return {'transferred': transferred, 'missing_cards': missing_cards, 'missing_packs': missing_packs}
@@ -0,0 +1,69 @@
+# Gunicorn settings for production serving:
+#   gunicorn -c gunicorn.conf.py "run:create_app()"
+# Graceful reload: send SIGHUP to the master (e.g. docker kill --signal=HUP flask_app).
+# Zero-downtime code deploys (TTIN new workers, wait for /healthz, TTOU old ones)
+# are driven by core/TOOLS/AUTOUPDATE_WEBHOOK_FROM_GITHUB.
+import os
+import sys
+import subprocess
+import multiprocessing
+from dotenv import load_dotenv
+
+# Third-party libraries are imported here, in the master, so every forked worker
+# shares them. The app itself (run.py, routes.py) is imported per worker unless
+# WEB_PRELOAD=1, so workers started after a git pull run the new code.
+import sqlite3
+import flask
+import jinja2
+import werkzeug
+
+load_dotenv()
+
+# Workers write Prometheus samples here so /metrics can aggregate all of them
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/nakama_metrics')
+
+# --- Settings (override in .env) ---
+bind = f"0.0.0.0:{os.getenv('PORT', '5002')}"
+workers = int(os.getenv('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+os.environ['WEB_WORKERS'] = str(workers)  # reported by /healthz for rolling reloads
+threads = int(os.getenv('WEB_THREADS', '4'))
+worker_class = 'gthread' if threads > 1 else 'sync'
+keepalive = int(os.getenv('WEB_KEEPALIVE', '5'))                  # seconds to hold idle keep-alive connections
+timeout = int(os.getenv('WEB_TIMEOUT', '120'))                    # /run_create_cards runs the whole pipeline
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))   # drain time for in-flight requests
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '0'))            # 0 = never recycle workers
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', '0'))
+
+# Import run.py once in the master too. Saves memory, but pins the app code:
+# neither HUP nor the webhook's rolling reload will pick up new code.
+preload_app = os.getenv('WEB_PRELOAD', '0') == '1'
+
+pidfile = os.getenv('WEB_PIDFILE', '/tmp/gunicorn.pid')
+accesslog = None
+errorlog = '-'
+loglevel = os.getenv('WEB_LOG_LEVEL', 'warning')
+
+
+def on_starting(server):
+    """Start every master with an empty metrics directory and an up-to-date schema."""
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        if name.endswith('.db'):
+            os.remove(os.path.join(metrics_dir, name))
+    # Schema migrations and backfills run once, before any worker boots. In a child
+    # process: importing app code here would pin it for every forked worker.
+    subprocess.run([sys.executable, '-c', 'from core.database import init_db; init_db()'],
+                   cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+
+
+def post_worker_init(worker):
+    """Count this worker as ready for the code it loaded (/healthz "ready", for rolling reloads)."""
+    from core.metrics import WORKERS_READY
+    WORKERS_READY.labels(worker.wsgi.config.get('CODE_REVISION') or 'unknown').set(1)
+
+
+def child_exit(server, worker):
+    """Drop live gauges (in-flight requests) of workers that exited."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
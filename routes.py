@@ -1,28 +1,48 @@
 import os
-import csv
+import re
+import hmac
+import json
+import mimetypes
 import subprocess
 from flask import (
     Blueprint, render_template, redirect, url_for, session,
     jsonify, abort, send_from_directory, request, current_app
 )
-from werkzeug.security import check_password_hash
+from werkzeug.security import check_password_hash, safe_join
 
 bp = Blueprint('main', __name__)
 
-from core.database import get_db, query_db
+from core.backup import BackupError, list_snapshots, read_status, start_snapshot
+from core.card_cache import card_cache
+from core.compression import COMPRESS_MIN_SIZE, choose_encoding, compress_body
+from core.database import (
+    card_url_key, data_version, enqueue_claim, get_db, query_db, run_write, write_transaction
+)
+from core.json_provider import Columnar
+from core.metrics import ready_workers, render_metrics
+from core.passwords import PasswordBusy, verify_password
+from core.single_flight import SingleFlight
+from core.static_cache import BUNDLE_NAME, asset_version, send_cached_asset
+from core.transfers import TransferError, transfer_cards
 
 def load_records_from_db():
     return query_db('SELECT * FROM cards')
 
 def authenticate_user(username, password):
-    """Authenticate user with username and password"""
+    """Authenticate user with username and password (raises PasswordBusy when logins queue up)"""
     user = query_db('SELECT * FROM users WHERE username = ?', [username], one=True)
-    if user and user['password'] == password:
-        return {
-            'username': user['username'],
-            'user_type': user['role']
-        }
-    return None
+    ok, new_hash = verify_password(user['password'] if user else None, password)
+    if not ok:
+        return None
+    if new_hash:
+        # Plaintext or outdated KDF parameters; only replace what we verified against
+        with write_transaction(name='rehash_password') as db:
+            db.execute('UPDATE users SET password = ? WHERE username = ? AND password = ?',
+                       (new_hash, user['username'], user['password']))
+    return {
+        'username': user['username'],
+        'user_type': user['role']
+    }
 
 def determine_user_is_admin(username):
     """Check if user is admin based on username"""
@@ -33,10 +53,73 @@ def determine_user_is_admin(username):
     # For now, rely on DB.
     return False
 
+IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg']
+IMAGE_CACHE_MAX_AGE = 365 * 24 * 3600  # content-hashed URLs never change, cache for a year
+
+def card_image_url(rec):
+    """URL of a card's full-size image: content-hashed once ingested, otherwise looked up on disk"""
+    if rec['image_filename'] and rec['image_hash']:
+        return url_for('main.card_image', digest=rec['image_hash'], filename=rec['image_filename'])
+    for ext in IMAGE_EXTENSIONS:
+        fname = f"{rec['card_id']}{ext}"
+        if os.path.exists(os.path.join(current_app.config['CARDS_FOLDER'], fname)):
+            return url_for('main.card_image', filename=fname)
+    return None
+
+def send_card_file(folder, filename, digest, accel_prefix):
+    """Send an image under a content-hashed URL with immutable caching, optionally offloaded to the proxy"""
+    mode = current_app.config.get('IMAGE_SENDFILE_MODE')
+    if mode in ('x-accel', 'x-sendfile'):
+        path = safe_join(os.path.join(current_app.root_path, folder), filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        )
+        response.set_etag(digest)
+        response.last_modified = os.path.getmtime(path)
+        response.make_conditional(request)
+        # Only hand the file to the proxy when it has to be sent: it would turn a 304 into a 200
+        if response.status_code != 304:
+            if mode == 'x-accel':
+                response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{filename}"
+            else:
+                response.headers['X-Sendfile'] = os.path.abspath(path)
+    else:
+        # send_from_directory sets the ETag and answers If-None-Match / If-Modified-Since (304) itself
+        response = send_from_directory(folder, filename, etag=digest, max_age=IMAGE_CACHE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.max_age = IMAGE_CACHE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+def get_user_thumbnails(username):
+    """Map card_id -> {format: [(width, filename, digest), ...]} for all of a user's cards in one query"""
+    rows = query_db(
+        'SELECT t.card_id, t.width, t.format, t.filename, c.image_hash FROM card_thumbnails t '
+        'JOIN cards c ON c.card_id = t.card_id '
+        'WHERE c.owner = ? COLLATE NOCASE ORDER BY t.width',
+        [username]
+    )
+    thumbs = {}
+    for r in rows:
+        thumbs.setdefault(r['card_id'], {}).setdefault(r['format'], []).append(
+            (r['width'], r['filename'], r['image_hash'])
+        )
+    return thumbs
+
+def build_srcset(variants):
+    """Build an <img srcset> value from (width, filename, digest) tuples"""
+    return ', '.join(
+        f"{url_for('main.card_thumb', filename=fname, digest=digest)} {width}w"
+        for width, fname, digest in variants
+    )
+
 def get_user_cards(username):
     # Depending on how exact the match needs to be. CSV was case-insensitive often.
     # Let's try exact match first, or use LIKE.
-    records = query_db('SELECT * FROM cards WHERE owner = ? COLLATE NOCASE', [username])
+    records = card_cache.owner_cards(username)
+    thumbs = get_user_thumbnails(username)
     cards = []
     for rec in records:
         cid = rec['card_id']
@@ -44,19 +127,16 @@ def get_user_cards(username):
             continue
             
         # Image logic
-        url = None
-        for ext in ['.png', '.jpg', '.jpeg']:
-            fname = f"{cid}{ext}"
-            path = os.path.join(current_app.config['CARDS_FOLDER'], fname)
-            if os.path.exists(path):
-                url = url_for('main.card_image', filename=fname)
-                break
-        
+        url = card_image_url(rec)
+
         # If no image found, url is None. The template might handle it or we skip?
         # The original code only appended if image exists:
         if url:
+            variants = thumbs.get(cid, {})
             cards.append({
                 'url': url,
+                'srcset': build_srcset(variants.get('webp', [])),
+                'srcset_png': build_srcset(variants.get('png', [])),
                 'CARD_ID': cid,
                 'status': rec['status'] or '',
                 'CARD_CHAIN': rec['chain'],
@@ -70,6 +150,119 @@ def get_user_cards(username):
             })
     return cards
 
+# STORE
+
+STORE_PAGE_SIZE = 24
+STORE_MAX_PAGE_SIZE = 100
+STORE_CACHE_MAX_ENTRIES = 256
+_store_first_page_cache = {}  # (chain, type, theme, limit) -> (store version, page)
+
+def get_store_version():
+    """Return the store listing version, bumped by triggers on every change"""
+    row = query_db('SELECT version FROM store_state WHERE id = 1', one=True)
+    return row['version'] if row else 0
+
+def get_store_packs(chain=None, card_type=None, theme=None, after=None, limit=STORE_PAGE_SIZE):
+    """Return one keyset page of store packs ordered by pack_id"""
+    if card_type:
+        # Walk the (card_type, pack_id) primary key so the type filter stays index-only
+        sql = 'SELECT p.* FROM store_pack_types t JOIN store_packs p ON p.pack_id = t.pack_id WHERE t.card_type = ?'
+        key = 't.pack_id'
+        args = [card_type]
+    else:
+        sql = 'SELECT p.* FROM store_packs p WHERE 1'
+        key = 'p.pack_id'
+        args = []
+    if chain:
+        sql += ' AND p.chain = ?'
+        args.append(chain)
+    if theme:
+        sql += ' AND p.theme = ?'
+        args.append(theme)
+    if after:
+        sql += f' AND {key} > ?'
+        args.append(after)
+    sql += f' ORDER BY {key} LIMIT ?'
+    args.append(limit + 1)
+
+    rows = query_db(sql, args)
+    packs = [{
+        'PACK_ID': r['pack_id'],
+        'CARD_CHAIN': r['chain'],
+        'CARD_THEME': r['theme'],
+        'CARD_TYPES': r['card_types'] or '',
+        'CARD_COUNT': r['card_count'],
+        'CARD_DATE': r['card_date'],
+    } for r in rows[:limit]]
+    next_cursor = packs[-1]['PACK_ID'] if len(rows) > limit else None
+    return {'packs': packs, 'next': next_cursor}
+
+def get_store_first_page(chain=None, card_type=None, theme=None, limit=STORE_PAGE_SIZE):
+    """Serve the first store page from memory while the store version is unchanged"""
+    key = (chain, card_type, theme, limit)
+    # Read the version before the page so a concurrent claim can only make the entry stale, never wrong
+    version = get_store_version()
+    cached = _store_first_page_cache.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+    page = get_store_packs(chain, card_type, theme, None, limit)
+    if len(_store_first_page_cache) >= STORE_CACHE_MAX_ENTRIES:
+        _store_first_page_cache.clear()
+    _store_first_page_cache[key] = (version, page)
+    return page
+
+# SEARCH
+
+SEARCH_PAGE_SIZE = 50
+SEARCH_MAX_PAGE_SIZE = 200
+
+def build_fts_query(text):
+    """Turn free text into an FTS5 query of quoted prefix terms, so user input is never parsed as syntax"""
+    terms = re.findall(r'\w+', text)
+    return ' '.join(f'"{t}"*' for t in terms)
+
+def search_cards(text, owner=None, offset=0, limit=SEARCH_PAGE_SIZE):
+    """Return one page of cards matching text, best matches first"""
+    match = build_fts_query(text)
+    if not match:
+        return [], False
+    sql = (
+        'SELECT c.* FROM cards_fts JOIN cards c ON c.rowid = cards_fts.rowid '
+        'WHERE cards_fts MATCH ?'
+    )
+    args = [match]
+    if owner is not None:
+        sql += ' AND c.owner = ? COLLATE NOCASE'
+        args.append(owner)
+    sql += ' ORDER BY cards_fts.rank LIMIT ? OFFSET ?'
+    args.extend([limit + 1, offset])
+    rows = query_db(sql, args)
+    return rows[:limit], len(rows) > limit
+
+# ACTIVATION
+
+ACTIVATE_BATCH_MAX = 1000  # card_ids per /activate_cards call
+
+def activate_cards(owner, card_ids=None, pack_id=None):
+    """
+    Activate (STATUS_3) owner's cards from card_ids or from a whole pack, in one
+    conditional UPDATE. Returns the card_ids that changed; cards that are missing,
+    someone else's or already active are left alone.
+    """
+    if pack_id is not None:
+        where, arg = 'pack_id = ?', pack_id
+    else:
+        # one JSON parameter instead of a placeholder per id
+        where, arg = 'card_id IN (SELECT value FROM json_each(?))', json.dumps(list(card_ids))
+    activated = run_write(lambda db: [r['card_id'] for r in db.execute(
+        f"UPDATE cards SET status = 'STATUS_3' "
+        f"WHERE {where} AND owner = ? AND status IS NOT 'STATUS_3' RETURNING card_id",
+        (arg, owner)
+    )], 'activate_cards')
+    if activated:
+        card_cache.invalidate(card_ids=activated, owners=[owner])
+    return activated
+
 # ROUTES
 
 @bp.route('/')
@@ -82,22 +275,17 @@ def login():
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '')
 
-        user = authenticate_user(username, password)
+        try:
+            user = authenticate_user(username, password)
+        except PasswordBusy:
+            return render_template('login.html', error='Too many login attempts, try again in a moment'), 503
         if user:
             session['user'] = {'username': username}
             next_page = session.pop('next_page', None)
 
-            if next_page == 'add_card_owner' and current_app.config.get('AUTH_USERS_CSV'):
-                os.makedirs(os.path.dirname(current_app.config['AUTH_USERS_CSV']), exist_ok=True)
-                with open(current_app.config['AUTH_USERS_CSV'], 'a', newline='', encoding='utf-8') as f:
-                    csv.writer(f).writerow([username, session.pop('ref_url', '')])
-                try:
-                    subprocess.run(
-                        ['python', 'core/BACKEND/D_change_card_owner/D_run_change_card_owner.py'],
-                        check=True
-                    )
-                except subprocess.CalledProcessError:
-                    pass
+            if next_page == 'add_card_owner':
+                # The claims_worker service applies it within CLAIM_POLL_SECONDS
+                enqueue_claim(username, session.pop('ref_url', ''))
                 return redirect(url_for('main.profile'))
 
             if next_page and next_page in current_app.view_functions:
@@ -118,7 +306,8 @@ def profile():
         'profile.html',
         user=user,
         is_admin=determine_user_is_admin(username),
-        cards=get_user_cards(username)
+        cards=get_user_cards(username),
+        fragments_version=asset_version(BUNDLE_NAME)
     )
 
 @bp.route('/logout')
@@ -133,16 +322,36 @@ def table():
         return redirect(url_for('main.profile'))
     return render_template('table.html', user=user)
 
+# Every open table.html polls /get_users; identical polls share one query + encode,
+# and one compression per encoding
+_table_polls = SingleFlight()
+
+def encode_all_records(columnar):
+    recs = load_records_from_db()
+    # recs is list of sqlite3.Row; the JSON provider encodes them directly
+    if columnar:
+        return jsonify(Columnar(recs)).get_data()
+    return jsonify({'columns': list(recs[0].keys()) if recs else [], 'records': recs}).get_data()
+
 @bp.route('/get_users')
 def get_users():
+    # ?layout=columns returns {"columns": [...], "rows": [[...], ...]}: no repeated keys per record
+    columnar = request.args.get('layout') == 'columns'
     try:
-        recs = load_records_from_db()
-        if not recs:
-            return jsonify({'columns': [], 'records': []})
-        # recs is list of sqlite3.Row
-        return jsonify({'columns': list(recs[0].keys()), 'records': [dict(r) for r in recs]})
+        key = 'get_users:columns' if columnar else 'get_users:records'
+        version = data_version()
+        body = _table_polls.do(key, version, lambda: encode_all_records(columnar))
+        encoding = choose_encoding() if len(body) >= COMPRESS_MIN_SIZE else None
+        if encoding is not None:
+            body = _table_polls.do(f'{key}:{encoding}', version, lambda: compress_body(body, encoding))
+        response = current_app.response_class(body, mimetype='application/json')
+        response.vary.add('Accept-Encoding')
+        if encoding is not None:
+            # init_compression leaves responses that already have a Content-Encoding alone
+            response.headers['Content-Encoding'] = encoding
+        return response
     except Exception as e:
-        return jsonify({'columns': [], 'records': [], 'error': str(e)}), 500
+        return jsonify({'columns': [], 'rows' if columnar else 'records': [], 'error': str(e)}), 500
 
 @bp.route('/api/cards')
 def api_cards():
@@ -151,33 +360,75 @@ def api_cards():
         return jsonify({'error': 'Unauthorized'}), 401
     return jsonify(get_user_cards(user['username']))
 
+@bp.route('/api/search')
+def api_search():
+    user = session.get('user')
+    if not user:
+        return jsonify({'error': 'Unauthorized'}), 401
+    text = request.args.get('q', '').strip()
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = int(request.args.get('limit', SEARCH_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'Invalid offset or limit'}), 400
+    limit = max(1, min(limit, SEARCH_MAX_PAGE_SIZE))
+
+    # Admins search every card, users only their own
+    owner = None if determine_user_is_admin(user['username']) else user['username']
+    rows, has_more = search_cards(text, owner, offset, limit)
+    return jsonify({
+        'columns': list(rows[0].keys()) if rows else [],
+        'records': rows,
+        'next_offset': offset + limit if has_more else None,
+    })
+
+@bp.route('/api/store')
+def api_store():
+    chain = request.args.get('chain') or None
+    card_type = request.args.get('type') or None
+    theme = request.args.get('theme') or None
+    after = request.args.get('after') or None
+    try:
+        limit = int(request.args.get('limit', STORE_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    limit = max(1, min(limit, STORE_MAX_PAGE_SIZE))
+
+    if after is None:
+        return jsonify(get_store_first_page(chain, card_type, theme, limit))
+    return jsonify(get_store_packs(chain, card_type, theme, after, limit))
+
 @bp.route('/card/<path:key>')
 def serve_card_page(key):
     suffix = f'/card/{key}'
-    # We don't store CARD_URL in the same way potentially, or we do.
-    # The CSV had CARD_URL. The DB has card_url.
-    # The logic in migration was: row.get('CARD_URL', '') -> card_url
-    
-    # We need to find a card where card_url ends with suffix
-    # SQLite LIKE can do this: '%/card/{key}'
-    
-    match = query_db("SELECT * FROM cards WHERE card_url LIKE ?", [f'%{suffix}'], one=True)
+    # Same exact lookup on idx_cards_url_key as the claims worker, so a card that
+    # renders here is the card a claim queued from this page will find
+    match = card_cache.card_by_url_key(card_url_key(suffix))
 
     if not match or match['owner'] != 'SYSTEM':
         abort(404)
-    cid = match['card_id']
-    url = None
-    for ext in ['.png','.jpg','.jpeg']:
-        fname = f'{cid}{ext}'
-        p = os.path.join(current_app.config['CARDS_FOLDER'], fname)
-        if os.path.exists(p):
-            url = url_for('main.card_image', filename=fname)
-            break
-    return render_template('add_card_owner.html', image_url=url)
+    # picked up by login(), which queues the claim once the user is authenticated
+    session['next_page'] = 'add_card_owner'
+    session['ref_url'] = suffix
+    return render_template('add_card_owner.html', image_url=card_image_url(match))
 
 @bp.route('/card_image/<filename>')
-def card_image(filename):
-    return send_from_directory(current_app.config['CARDS_FOLDER'], filename)
+@bp.route('/card_image/<digest>/<filename>')
+def card_image(filename, digest=None):
+    if digest is None:
+        return send_from_directory(current_app.config['CARDS_FOLDER'], filename)
+    return send_card_file(
+        current_app.config['CARDS_FOLDER'], filename, digest, current_app.config['IMAGE_ACCEL_PREFIX']
+    )
+
+@bp.route('/card_thumb/<filename>')
+@bp.route('/card_thumb/<digest>/<filename>')
+def card_thumb(filename, digest=None):
+    if digest is None:
+        return send_from_directory(current_app.config['CARDS_THUMBS_FOLDER'], filename)
+    return send_card_file(
+        current_app.config['CARDS_THUMBS_FOLDER'], filename, digest, current_app.config['THUMB_ACCEL_PREFIX']
+    )
 
 @bp.route('/run_create_cards', methods=['POST'])
 def run_create_cards():
@@ -189,9 +440,16 @@ def run_create_cards():
             ['python', os.path.join('core','BACKEND','A_create_cards','A_run_create_cards.py')],
             check=True
         )
+        subprocess.run(
+            ['python', os.path.join('core','BACKEND','C_send_packs_to_store','C_run_send_packs_to_store.py')],
+            check=True
+        )
         return jsonify({'status': 'success'})
     except subprocess.CalledProcessError as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
+    finally:
+        # the stages rewrite cards, even when one of them fails halfway
+        card_cache.clear()
 
 @bp.route('/activate_card', methods=['POST'])
 def activate_card():
@@ -205,49 +463,157 @@ def activate_card():
     if not card_id:
         return jsonify({'status': 'error', 'message': 'Missing card_id'}), 400
 
-    # Verify ownership and current status
-    # We only activate if it's currently in STATUS_2 (Owned but not active)
-    # Or maybe we allow it from STATUS_1 if they own it? Usually STATUS_2 implies ownership.
-    # Let's check DB.
-    
-    row = query_db('SELECT * FROM cards WHERE card_id = ?', [card_id], one=True)
+    # Missing, foreign and already active cards are answered from the cache
+    # without a write; the UPDATE still checks owner and status itself
+    row = card_cache.card(card_id)
+    if row and row['owner'] == user['username'] and row['status'] != 'STATUS_3':
+        try:
+            if activate_cards(user['username'], card_ids=[card_id]):
+                return jsonify({'status': 'success', 'new_status': 'STATUS_3'})
+        except Exception as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 500
+        # Changed by someone else in between: look up why
+        row = query_db('SELECT owner, status FROM cards WHERE card_id = ?', [card_id], one=True)
+
     if not row:
         return jsonify({'status': 'error', 'message': 'Card not found'}), 404
-        
     if row['owner'] != user['username']:
         return jsonify({'status': 'error', 'message': 'Not your card'}), 403
-        
-    # Check if already active
-    if row['status'] == 'STATUS_3':
-        return jsonify({'status': 'success', 'message': 'Already active', 'new_status': 'STATUS_3'})
-        
-    # Update to STATUS_3
-    # Use direct DB execution
+    return jsonify({'status': 'success', 'message': 'Already active', 'new_status': 'STATUS_3'})
+
+@bp.route('/activate_cards', methods=['POST'])
+def activate_cards_batch():
+    """Activate a list of card_ids ({"card_ids": [...]}) or a whole pack ({"pack_id": ...}) in one transaction"""
+    user = session.get('user')
+    if not user:
+        return jsonify({'status': 'error', 'message': 'Unauthorized'}), 401
+
+    data = request.get_json(silent=True) or {}
+    pack_id = data.get('pack_id')
+    card_ids = data.get('card_ids')
+    if pack_id is not None and not isinstance(pack_id, str):
+        return jsonify({'status': 'error', 'message': 'pack_id must be a string'}), 400
+    if pack_id:
+        card_ids = None
+    elif not isinstance(card_ids, list) or not card_ids or not all(isinstance(c, str) for c in card_ids):
+        return jsonify({'status': 'error', 'message': 'Missing card_ids or pack_id'}), 400
+    elif len(card_ids) > ACTIVATE_BATCH_MAX:
+        return jsonify({'status': 'error', 'message': f'At most {ACTIVATE_BATCH_MAX} card_ids per call'}), 400
+
     try:
-        db = get_db()
-        db.execute("UPDATE cards SET status = 'STATUS_3' WHERE card_id = ?", (card_id,))
-        db.commit()
-        return jsonify({'status': 'success', 'new_status': 'STATUS_3'})
+        activated = activate_cards(user['username'], card_ids=card_ids, pack_id=pack_id)
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
+    result = {'status': 'success', 'activated': activated, 'new_status': 'STATUS_3'}
+    if card_ids is not None:
+        done = set(activated)
+        result['skipped'] = [cid for cid in card_ids if cid not in done]
+    return jsonify(result)
+
+@bp.route('/admin/transfer_cards', methods=['POST'])
+def transfer_cards_api():
+    """Admin: give a user whole packs and/or card_ids in one transaction ({"username", "pack_ids", "card_ids"})"""
+    user = session.get('user')
+    if not user or not determine_user_is_admin(user['username']):
+        return jsonify({'status': 'error', 'message': 'Unauthorized'}), 401
+
+    data = request.get_json(silent=True) or {}
+    username = (data.get('username') or '').strip()
+    card_ids = data.get('card_ids') or []
+    pack_ids = data.get('pack_ids') or []
+    if not username:
+        return jsonify({'status': 'error', 'message': 'Missing username'}), 400
+    if not all(isinstance(v, list) and all(isinstance(i, str) for i in v) for v in (card_ids, pack_ids)):
+        return jsonify({'status': 'error', 'message': 'card_ids and pack_ids must be lists of strings'}), 400
+
+    try:
+        result = transfer_cards(username, card_ids=card_ids, pack_ids=pack_ids)
+    except TransferError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+    finally:
+        # previous owners aren't known here; drop every cached owner list
+        card_cache.clear()
+    return jsonify({'status': 'success', **result})
+
+@bp.route('/admin/backup', methods=['POST'])
+def admin_backup():
+    """Admin: start a verified online snapshot of nakama.db in the background (poll /admin/backup/status)"""
+    user = session.get('user')
+    if not user or not determine_user_is_admin(user['username']):
+        return jsonify({'status': 'error', 'message': 'Unauthorized'}), 401
+    try:
+        start_snapshot()
+    except BackupError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    except OSError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+    return jsonify({'status': 'accepted', 'status_url': url_for('main.admin_backup_status')}), 202
+
+@bp.route('/admin/backup/status')
+def admin_backup_status():
+    """Admin: state of the last snapshot (running, done with its details, or failed with the error)"""
+    user = session.get('user')
+    if not user or not determine_user_is_admin(user['username']):
+        return jsonify({'status': 'error', 'message': 'Unauthorized'}), 401
+    return jsonify(read_status())
+
+@bp.route('/admin/backups')
+def admin_backups():
+    user = session.get('user')
+    if not user or not determine_user_is_admin(user['username']):
+        return jsonify({'status': 'error', 'message': 'Unauthorized'}), 401
+    return jsonify([
+        {'name': os.path.basename(p), 'size': os.path.getsize(p)} for p in list_snapshots()
+    ])
+
+@bp.route('/healthz')
+def healthz():
+    """Readiness probe: the DB answers, and this worker reports the code revision it loaded"""
+    try:
+        query_db('SELECT 1')
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503
+    return jsonify({
+        'status': 'ok',
+        'revision': current_app.config.get('CODE_REVISION'),
+        'workers': int(os.getenv('WEB_WORKERS', '0')) or None,
+        # booted workers per revision, across all workers (not only the one answering)
+        'ready': ready_workers(),
+    })
+
+@bp.route('/metrics')
+def metrics():
+    # Scrapers authenticate with METRICS_TOKEN; admins can also view it from the browser
+    token = current_app.config.get('METRICS_TOKEN')
+    auth = request.headers.get('Authorization', '')
+    if not (token and hmac.compare_digest(auth, f'Bearer {token}')):
+        user = session.get('user')
+        if not user or not determine_user_is_admin(user['username']):
+            return jsonify({'error': 'Unauthorized'}), 401
+    body, content_type = render_metrics()
+    return current_app.response_class(body, content_type=content_type)
 
 @bp.errorhandler(404)
 def handle_404(e):
     return render_template('404.html'), 404
 
-# Serve the client-side fragments
+# Serve the client-side fragments (held in memory, precompressed)
 
 @bp.route('/card_1.html')
 def card_fragment():
-    fragment_dir = os.path.join(current_app.root_path, 'core', 'FRONTEND')
-    return send_from_directory(fragment_dir, 'card_1.html')
+    return send_cached_asset('card_1.html')
 
 @bp.route('/card_2.html')
 def card2_fragment():
-    fragment_dir = os.path.join(current_app.root_path, 'core', 'FRONTEND')
-    return send_from_directory(fragment_dir, 'card_2.html')
+    return send_cached_asset('card_2.html')
 
 @bp.route('/card_3.html')
 def card3_fragment():
-    fragment_dir = os.path.join(current_app.root_path, 'core', 'FRONTEND')
-    return send_from_directory(fragment_dir, 'card_3.html')
+    return send_cached_asset('card_3.html')
+
+@bp.route('/card_fragments')
+def card_fragments():
+    """All card templates in one response, keyed by status"""
+    return send_cached_asset(BUNDLE_NAME)
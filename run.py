@@ -3,6 +3,7 @@ sys.dont_write_bytecode = True  # disable writing .pyc files into **pycache**
 
 import os
 from flask import Flask
+from jinja2 import FileSystemBytecodeCache
 from werkzeug.middleware.proxy_fix import ProxyFix
 import logging
 from dotenv import load_dotenv
@@ -10,11 +11,25 @@ from dotenv import load_dotenv
 # CONFIGURATION
 load_dotenv()
 APP_SECRET = os.getenv('SESSION_SECRET')
-AUTH_USERS_CSV = os.getenv('AUTH_USERS')  # path to file for authenticated users logging
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')  # bearer token for Prometheus scrapes of /metrics
+AUTH_USERS_CSV = os.getenv('AUTH_USERS')  # optional: legacy claims CSV, moved into pending_claims by the claims worker
 TEMPLATE_FOLDER = os.getenv('TEMPLATE_FOLDER')
 CARDS_FOLDER = os.getenv('CARDS_BANK_FOLDER')
+CARDS_THUMBS_FOLDER = os.getenv('CARDS_THUMBS_FOLDER') or (
+    os.path.join(CARDS_FOLDER, 'thumbs') if CARDS_FOLDER else None
+)
 SYSTEM_CSV = os.getenv('SYSTEM_FULL_DB_CSV')  # path to full DB CSV
 
+# Optional reverse-proxy offload for card images: 'x-accel' (nginx) or 'x-sendfile' (apache/lighttpd)
+IMAGE_SENDFILE_MODE = os.getenv('IMAGE_SENDFILE_MODE', '').lower()
+IMAGE_ACCEL_PREFIX = os.getenv('IMAGE_ACCEL_PREFIX', '/protected/cards_bank/')
+THUMB_ACCEL_PREFIX = os.getenv('THUMB_ACCEL_PREFIX', '/protected/cards_bank/thumbs/')
+
+# Production template mode: no per-render stat() of templates, compiled bytecode
+# shared by all workers through the filesystem cache
+PRODUCTION = os.getenv('FLASK_ENV') == 'production'
+JINJA_CACHE_DIR = os.getenv('JINJA_CACHE_DIR', '/tmp/nakama_jinja_cache')
+
 # Paths to whitelist CSVs and auth
 ADMIN_DB = os.path.join('core', 'data', 'admin_db.csv')
 USER_DB = os.path.join('core', 'data', 'user_db.csv')
@@ -29,13 +44,44 @@ required_envs = {
     'SESSION_SECRET': APP_SECRET,
     'TEMPLATE_FOLDER': TEMPLATE_FOLDER,
     'CARDS_BANK_FOLDER': CARDS_FOLDER,
-    'AUTH_USERS': AUTH_USERS_CSV,
     'SYSTEM_FULL_DB_CSV': SYSTEM_CSV,
 }
 for name, val in required_envs.items():
     if not val:
         raise SystemExit(f"{name} must be set in .env")
 
+def read_git_revision(root):
+    """Return the checked-out commit by reading .git directly (the app image has no git binary)."""
+    git_dir = os.path.join(root, '.git')
+    try:
+        with open(os.path.join(git_dir, 'HEAD'), encoding='utf-8') as f:
+            head = f.read().strip()
+        if not head.startswith('ref: '):
+            return head
+        ref = head[len('ref: '):]
+        ref_path = os.path.join(git_dir, ref)
+        if os.path.exists(ref_path):
+            with open(ref_path, encoding='utf-8') as f:
+                return f.read().strip()
+        with open(os.path.join(git_dir, 'packed-refs'), encoding='utf-8') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except OSError:
+        pass
+    return None
+
+def start_claims_worker():
+    """
+    The claims_worker service for the development server: /login only queues claims,
+    and this applies them (production runs it as the claims_worker container).
+    """
+    import subprocess
+    root = os.path.dirname(os.path.abspath(__file__))
+    script = os.path.join(root, 'core', 'BACKEND', 'D_change_card_owner', 'DA_move_auth_user_to_db.py')
+    return subprocess.Popen([sys.executable, script, '--loop'], cwd=root)
+
 # Silence werkzeug logs
 werkzeug_logger = logging.getLogger('werkzeug')
 werkzeug_logger.setLevel(logging.CRITICAL)
@@ -46,7 +92,36 @@ def create_app():
     app.secret_key = APP_SECRET
     app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
     app.config['PREFERRED_URL_SCHEME'] = 'https'
-    app.config['TEMPLATES_AUTO_RELOAD'] = True
+    app.config['TEMPLATES_AUTO_RELOAD'] = not PRODUCTION
+    if PRODUCTION:
+        # must be set before app.jinja_env is first used
+        os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+        app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(JINJA_CACHE_DIR)}
+
+    # orjson-backed jsonify that encodes sqlite3.Row lists without copying them to dicts
+    from core.json_provider import init_json
+    init_json(app)
+
+    # make sure schema additions (indexes, store catalog) exist on the current DB
+    from core.database import init_db
+    init_db()
+
+    # per-endpoint latency, status, size and in-flight metrics
+    from core.metrics import init_metrics
+    init_metrics(app)
+
+    # opt-in per-request SQL profiling (SQL_PROFILE=1)
+    from core.sql_profiler import init_sql_profiler
+    init_sql_profiler(app)
+
+    # card fragments, read and precompressed once
+    from core.static_cache import load_static_cache
+    load_static_cache(app)
+
+    # gzip/brotli for large JSON and HTML responses (registered after metrics
+    # so the recorded response sizes are the compressed ones)
+    from core.compression import init_compression
+    init_compression(app)
 
     # import and register routes blueprint
     from routes import bp as main_bp
@@ -64,17 +139,35 @@ def create_app():
     # attach helpers to app
     app.config.update({
         'CARDS_FOLDER': CARDS_FOLDER,
+        'CARDS_THUMBS_FOLDER': CARDS_THUMBS_FOLDER,
+        'IMAGE_SENDFILE_MODE': IMAGE_SENDFILE_MODE,
+        'IMAGE_ACCEL_PREFIX': IMAGE_ACCEL_PREFIX,
+        'THUMB_ACCEL_PREFIX': THUMB_ACCEL_PREFIX,
         'SYSTEM_CSV': SYSTEM_CSV,
         'AUTH_USERS_CSV': AUTH_USERS_CSV,
         'ADMIN_DB': ADMIN_DB,
         'USER_DB': USER_DB,
-        'USERS_AUTH_CSV': USERS_AUTH_CSV
+        'USERS_AUTH_CSV': USERS_AUTH_CSV,
+        'METRICS_TOKEN': METRICS_TOKEN,
+        # code this process loaded; /healthz reports it so deploys can tell new workers from old
+        'CODE_REVISION': read_git_revision(os.path.dirname(os.path.abspath(__file__))),
     })
+    if PRODUCTION:
+        precompile_templates(app)
     return app
 
+def precompile_templates(app):
+    """Compile every template at startup (loading bytecode when another worker already did)."""
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(name)
+
 if __name__ == '__main__':
     app = create_app()
     print(f"- - https://nakama.weforks.org/")
     print(f"- - http://localhost:{PORT}/")
-    app.run(host='0.0.0.0', port=PORT, debug=False, use_reloader=False)
+    claims_worker = start_claims_worker()
+    try:
+        app.run(host='0.0.0.0', port=PORT, debug=False, use_reloader=False)
+    finally:
+        claims_worker.terminate()
     
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""
+Regression tests for batch activation, admin transfers, the claim queue and FTS
+search, against the app on a small synthetic DB (core/TOOLS/BENCHMARKS/synthetic_db.py).
+
+    python -m pytest tests
+
+The app and the DB are shared by the whole module, so each test reads the cards
+it needs when it starts and only checks what it changed itself.
+"""
+import os
+import sys
+import sqlite3
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'core', 'TOOLS', 'BENCHMARKS'))
+sys.path.insert(0, os.path.join(ROOT, 'core', 'BACKEND', 'D_change_card_owner'))
+from synthetic_db import BENCH_PASSWORD, build_synthetic_db, username
+
+CARDS = 300
+USERS = 6
+ADMIN = username(0)
+
+@pytest.fixture(scope='module')
+def bench(tmp_path_factory):
+    """(app, db path): create_app() on a fresh synthetic DB; environment and cwd restored afterwards."""
+    import core.database
+    from load_test import create_bench_app
+    out = tmp_path_factory.mktemp('nakama_bench')
+    info = build_synthetic_db(CARDS, USERS, str(out))
+    saved_env, saved_cwd, saved_path = dict(os.environ), os.getcwd(), core.database.DB_PATH
+    try:
+        yield create_bench_app(info, str(out)), info['db']
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_env)
+        os.chdir(saved_cwd)
+        core.database.DB_PATH = saved_path
+
+@pytest.fixture
+def app(bench):
+    return bench[0]
+
+def read(bench, sql, args=()):
+    conn = sqlite3.connect(bench[1])
+    try:
+        return conn.execute(sql, args).fetchall()
+    finally:
+        conn.close()
+
+def login(app, user):
+    client = app.test_client()
+    response = client.post('/login', data={'username': user, 'password': BENCH_PASSWORD})
+    assert response.status_code == 302
+    return client
+
+def card_of(bench, owner, status):
+    # hashed images first: /api/cards leaves out cards whose image isn't on disk
+    rows = read(bench, 'SELECT card_id FROM cards WHERE owner = ? AND status = ? '
+                       'ORDER BY image_hash IS NULL, card_id LIMIT 1', (owner, status))
+    assert rows, f'synthetic DB has no {status} card of {owner}'
+    return rows[0][0]
+
+# ACTIVATION
+
+def test_activate_cards_reports_skipped_and_missing(bench, app):
+    user, other = username(1), username(2)
+    inactive = card_of(bench, user, 'STATUS_2')
+    active = card_of(bench, user, 'STATUS_3')
+    foreign = card_of(bench, other, 'STATUS_2')
+    client = login(app, user)
+    client.get('/api/cards')  # warm the card cache, which the activation has to invalidate
+
+    response = client.post('/activate_cards', json={'card_ids': [inactive, active, foreign, 'Card_missing']})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['activated'] == [inactive]
+    assert body['skipped'] == [active, foreign, 'Card_missing']
+    assert dict(read(bench, 'SELECT card_id, status FROM cards WHERE card_id IN (?, ?)', (inactive, foreign))) \
+        == {inactive: 'STATUS_3', foreign: 'STATUS_2'}
+    statuses = {c['CARD_ID']: c['status'] for c in client.get('/api/cards').get_json()}
+    assert statuses[inactive] == 'STATUS_3'
+
+def test_activate_cards_rejects_bad_input(app):
+    client = login(app, username(1))
+    assert client.post('/activate_cards', json={}).status_code == 400
+    assert client.post('/activate_cards', json={'card_ids': [1, 2]}).status_code == 400
+    assert app.test_client().post('/activate_cards', json={'card_ids': ['Card_0000000']}).status_code == 401
+
+def test_activate_card_explains_unchanged_cards(bench, app):
+    user = username(3)
+    client = login(app, user)
+    foreign = card_of(bench, username(1), 'STATUS_3')
+    active = card_of(bench, user, 'STATUS_3')
+    inactive = card_of(bench, user, 'STATUS_2')
+
+    assert client.post('/activate_card', json={'card_id': 'Card_missing'}).status_code == 404
+    assert client.post('/activate_card', json={'card_id': foreign}).status_code == 403
+    assert client.post('/activate_card', json={'card_id': active}).get_json()['message'] == 'Already active'
+    assert client.post('/activate_card', json={'card_id': inactive}).get_json()['status'] == 'success'
+    assert client.post('/activate_card', json={'card_id': inactive}).get_json()['message'] == 'Already active'
+
+# TRANSFERS
+
+def test_transfer_cards_reports_missing_packs_and_cards(bench, app):
+    target = username(5)
+    pack = read(bench, "SELECT pack_id FROM cards WHERE owner = 'SYSTEM' ORDER BY pack_id DESC LIMIT 1")[0][0]
+    pack_cards = {r[0] for r in read(bench, 'SELECT card_id FROM cards WHERE pack_id = ?', (pack,))}
+    single = read(bench, 'SELECT card_id FROM cards WHERE pack_id != ? AND owner != ? LIMIT 1', (pack, target))[0][0]
+    client = login(app, ADMIN)
+
+    response = client.post('/admin/transfer_cards', json={
+        'username': target, 'pack_ids': [pack, 'Pack_missing'], 'card_ids': [single, 'Card_missing'],
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['transferred'] == len(pack_cards) + 1
+    assert body['missing_packs'] == ['Pack_missing']
+    assert body['missing_cards'] == ['Card_missing']
+    owners = read(bench, 'SELECT DISTINCT owner FROM cards WHERE pack_id = ? OR card_id = ?', (pack, single))
+    assert owners == [(target,)]
+
+def test_transfer_cards_errors(app):
+    admin = login(app, ADMIN)
+    assert admin.post('/admin/transfer_cards', json={'username': 'nobody', 'card_ids': ['Card_0000000']}) \
+        .status_code == 400
+    assert admin.post('/admin/transfer_cards', json={'username': username(5)}).status_code == 400
+    user = login(app, username(1))
+    assert user.post('/admin/transfer_cards', json={'username': username(1), 'card_ids': ['Card_0000000']}) \
+        .status_code == 401
+
+# CLAIMS
+
+def process_claims(app):
+    import DA_move_auth_user_to_db as claims
+    from core.database import get_db
+    with app.app_context():
+        return claims.process_pending_claims(get_db())
+
+def test_claim_is_queued_at_login_and_applied_by_the_worker(bench, app):
+    card_id, key = read(bench, "SELECT card_id, card_keys FROM cards WHERE owner = 'SYSTEM' "
+                               "ORDER BY card_id LIMIT 1")[0]
+    process_claims(app)  # start from an empty queue
+    winner, loser = username(4), username(2)
+
+    for user in (winner, loser):
+        client = app.test_client()
+        assert client.get(f'/card/{key}').status_code == 200
+        assert client.post('/login', data={'username': user, 'password': BENCH_PASSWORD}).status_code == 302
+    # queued only: the card changes owner once the worker runs
+    assert read(bench, 'SELECT owner FROM cards WHERE card_id = ?', (card_id,)) == [('SYSTEM',)]
+    assert read(bench, 'SELECT username, ref_url FROM pending_claims WHERE processed_at IS NULL ORDER BY id') \
+        == [(winner, key), (loser, key)]
+
+    assert process_claims(app) == 2
+    assert read(bench, 'SELECT owner, status FROM cards WHERE card_id = ?', (card_id,)) == [(winner, 'STATUS_2')]
+    results = read(bench, 'SELECT username, result FROM pending_claims ORDER BY id DESC LIMIT 2')
+    assert results == [(loser, 'already_owned'), (winner, 'claimed')]
+    # claimed cards no longer render the claim page
+    assert app.test_client().get(f'/card/{key}').status_code == 404
+
+def test_claim_matches_full_urls_and_reports_unknown_cards(bench, app):
+    from core.database import enqueue_claim
+    card_id, url = read(bench, "SELECT card_id, card_url FROM cards WHERE owner = 'SYSTEM' "
+                               "ORDER BY card_id LIMIT 1")[0]
+    process_claims(app)
+    user = username(1)
+    with app.app_context():
+        enqueue_claim(user, url)
+        enqueue_claim(user, 'https://nakama.local/card/no-such-card')
+
+    assert process_claims(app) == 2
+    assert read(bench, 'SELECT owner FROM cards WHERE card_id = ?', (card_id,)) == [(user,)]
+    results = read(bench, 'SELECT result FROM pending_claims ORDER BY id DESC LIMIT 2')
+    assert results == [('not_found',), ('claimed',)]
+
+# SEARCH
+
+def search_all(client, query, limit):
+    """Follow next_offset through every page; returns (card_ids in order, pages)."""
+    card_ids, offset, pages = [], 0, 0
+    while offset is not None:
+        body = client.get('/api/search', query_string={'q': query, 'offset': offset, 'limit': limit}).get_json()
+        card_ids += [r['card_id'] for r in body['records']]
+        offset, pages = body['next_offset'], pages + 1
+    return card_ids, pages
+
+def test_search_pages_cover_every_match_once(bench, app):
+    admin = login(app, ADMIN)
+    card_ids, pages = search_all(admin, 'bench', 70)
+    assert len(card_ids) == len(set(card_ids)) == CARDS
+    assert pages == -(-CARDS // 70)
+
+    user = username(1)
+    owned = {r[0] for r in read(bench, 'SELECT card_id FROM cards WHERE owner = ?', (user,))}
+    card_ids, _ = search_all(login(app, user), 'bench', 7)
+    assert len(card_ids) == len(set(card_ids))
+    assert set(card_ids) == owned
+
+def test_search_treats_input_as_text(app):
+    client = login(app, ADMIN)
+    for query in ('"', 'bench OR', 'NEAR(', '*'):
+        response = client.get('/api/search', query_string={'q': query})
+        assert response.status_code == 200
+    assert client.get('/api/search', query_string={'q': 'bench', 'offset': 'x'}).status_code == 400
@@ -0,0 +1,40 @@
+"""
+Import-time gate for the pipeline stages and core modules (core/TOOLS/BENCHMARKS/import_time.py).
+
+    python -m pytest tests
+
+Each target is imported in a fresh interpreter. A stage must not pull in HEAVY
+libraries at module level, and no stage or core module may go over BUDGET_MS.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'core', 'TOOLS', 'BENCHMARKS'))
+from import_time import APP_MODULES, BUDGET_MS, CORE_MODULES, ROOT as IMPORT_ROOT, measure, stage_targets
+
+REPEAT = 3  # median of three, so one slow interpreter start doesn't fail the run
+
+STAGES = stage_targets()
+CORE = [(module, IMPORT_ROOT, module) for module in CORE_MODULES]
+
+@pytest.mark.parametrize('label, directory, module', STAGES, ids=[label for label, _, _ in STAGES])
+def test_stage_import(label, directory, module):
+    r = measure(directory, module, REPEAT)
+    assert r['error'] is None, f"{label} fails to import: {r['error']}"
+    assert not r['heavy'], f"{label} imports {', '.join(r['heavy'])} at module level"
+    assert r['ms'] <= BUDGET_MS, f"{label} takes {r['ms']:.0f} ms to import (budget {BUDGET_MS:.0f} ms)"
+
+@pytest.mark.parametrize('label, directory, module', CORE, ids=[label for label, _, _ in CORE])
+def test_core_module_import(label, directory, module):
+    r = measure(directory, module, REPEAT)
+    assert r['error'] is None, f"{label} fails to import: {r['error']}"
+    assert r['ms'] <= BUDGET_MS, f"{label} takes {r['ms']:.0f} ms to import (budget {BUDGET_MS:.0f} ms)"
+
+@pytest.mark.parametrize('module', APP_MODULES)
+def test_app_imports(module):
+    # The app may load Flask and everything else; it only has to import
+    r = measure(IMPORT_ROOT, module, 1)
+    assert r['error'] is None, f"{module} fails to import: {r['error']}"